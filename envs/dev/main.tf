@@ -224,8 +224,9 @@ module "api_rds" {
 
   lambda_exec_role_arn = module.sys_lambda.lambda_exec_role_arn
 
-  db_secret_arn = module.sys_rds.db_secret_arn
-  db_host       = module.sys_rds.db_host
+  db_secret_arn  = module.sys_rds.db_secret_arn
+  db_host        = module.sys_rds.db_host
+  db_reader_host = module.sys_rds.db_reader_host
 
   api_gateway_id            = module.sys_lambda.api_gateway_id
   api_gateway_execution_arn = module.sys_lambda.api_gateway_execution_arn
@@ -324,6 +325,10 @@ module "api_queue" {
 
   api_gateway_id            = module.sys_lambda.api_gateway_id
   api_gateway_execution_arn = module.sys_lambda.api_gateway_execution_arn
+
+  # The module refuses consumer_enabled without a handler
+  consumer_enabled = var.queue_consumer_enabled
+  consumer_handler = var.queue_consumer_handler
 }
 
 module "api_todo" {
@@ -67,4 +67,16 @@ variable "oauth_logout_urls" {
 
 variable "all_domains" {
   type = map(string)
+}
+
+variable "queue_consumer_enabled" {
+  description = "Attach the SQS consumer Lambda to the demo queue (needs queue_consumer_handler)"
+  type        = bool
+  default     = false
+}
+
+variable "queue_consumer_handler" {
+  description = "module:function in scripts/api-queue that processes each queued message"
+  type        = string
+  default     = ""
 }
\ No newline at end of file
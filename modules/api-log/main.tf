@@ -71,6 +71,12 @@ resource "aws_apigatewayv2_route" "api_log_get_route" {
   target = "integrations/${aws_apigatewayv2_integration.api_log.id}"
 }
 
+resource "aws_apigatewayv2_route" "api_log_get_stats_route" {
+  api_id    = var.api_gateway_id
+  route_key = "GET /api-log/stats"
+  target    = "integrations/${aws_apigatewayv2_integration.api_log.id}"
+}
+
 # Explicit CORS preflight routes
 resource "aws_apigatewayv2_route" "cors_api_log_root" {
   api_id    = var.api_gateway_id
@@ -103,4 +103,68 @@ resource "aws_lambda_permission" "t5_api_queue_apigw_invoke" {
 # SQS Queue
 resource "aws_sqs_queue" "queue" {
   name = "${var.project}-${var.env}-queue"
+
+  # AWS guidance for Lambda consumers: at least 6x the function timeout
+  visibility_timeout_seconds = 90
+
+  # Messages that keep failing in the consumer end up in the DLQ
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.queue_dlq.arn
+    maxReceiveCount     = 10
+  })
+}
+
+resource "aws_sqs_queue" "queue_dlq" {
+  name                      = "${var.project}-${var.env}-queue-dlq"
+  message_retention_seconds = 1209600
+}
+
+#########################################################
+# LAMBDA: api-queue consumer (SQS-triggered)
+#########################################################
+
+# Same package as api-queue, second entry point
+resource "aws_lambda_function" "t5_api_queue_consumer" {
+  function_name    = "t5-api-queue-consumer"
+  handler          = "consumer.lambda_handler"
+  runtime          = "python3.11"
+  role             = var.lambda_exec_role_arn
+  timeout          = 15
+  filename         = "${path.module}/../../scripts/api-queue/lambda_payload.zip"
+  source_code_hash = filebase64sha256("${path.module}/../../scripts/api-queue/lambda_payload.zip")
+
+  vpc_config {
+    subnet_ids         = var.private_subnet_ids
+    security_group_ids = [var.lambda_sg_id]
+  }
+
+  environment {
+    variables = {
+      CONSUMER_WORKERS = "8"
+      CONSUMER_HANDLER = var.consumer_handler
+    }
+  }
+}
+
+# Disabled by default: while enabled it drains the queue (into
+# consumer_handler), so the HTTP GET route on the dashboard will mostly come
+# back empty.
+resource "aws_lambda_event_source_mapping" "t5_api_queue_consumer" {
+  event_source_arn                   = aws_sqs_queue.queue.arn
+  function_name                      = aws_lambda_function.t5_api_queue_consumer.arn
+  enabled                            = var.consumer_enabled
+  batch_size                         = 50
+  maximum_batching_window_in_seconds = 2
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = var.consumer_max_concurrency
+  }
+
+  lifecycle {
+    precondition {
+      condition     = !var.consumer_enabled || var.consumer_handler != ""
+      error_message = "consumer_enabled needs consumer_handler; without it every message is retried into the DLQ."
+    }
+  }
 }
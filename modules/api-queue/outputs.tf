@@ -10,3 +10,7 @@ output "api_chart_integration_id" {
   value = aws_apigatewayv2_integration.t5_api_queue_integration.id
 }
 
+
+output "consumer_function_name" {
+  value = aws_lambda_function.t5_api_queue_consumer.function_name
+}
@@ -20,8 +20,24 @@ variable "api_gateway_id" {}
 
 variable "api_gateway_execution_arn" {}
 
-
-
-
-
-
+variable "consumer_enabled" {
+  type    = bool
+  default = false
+}
+
+# "module:function" in scripts/api-queue that processes each message; the
+# consumer acknowledges nothing until this is set
+variable "consumer_handler" {
+  type    = string
+  default = ""
+
+  validation {
+    condition     = var.consumer_handler == "" || can(regex("^[A-Za-z_][A-Za-z0-9_.]*:[A-Za-z_][A-Za-z0-9_]*$", var.consumer_handler))
+    error_message = "consumer_handler must be \"module:function\", e.g. \"orders:process\"."
+  }
+}
+
+variable "consumer_max_concurrency" {
+  type    = number
+  default = 2
+}
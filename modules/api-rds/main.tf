@@ -36,9 +36,10 @@ resource "aws_lambda_function" "api_rds" {
 
   environment {
     variables = {
-      SECRET_ARN = var.db_secret_arn
-      DB_HOST    = var.db_host
-      TABLE_NAME = "${var.project}-${var.env}-health"
+      SECRET_ARN     = var.db_secret_arn
+      DB_HOST        = var.db_host
+      DB_READER_HOST = var.db_reader_host
+      TABLE_NAME     = "${var.project}-${var.env}-health"
     }
   }
 }
@@ -62,6 +63,12 @@ resource "aws_apigatewayv2_route" "api_rds_post" {
   target    = "integrations/${aws_apigatewayv2_integration.api_rds.id}"
 }
 
+resource "aws_apigatewayv2_route" "api_rds_post_bulk" {
+  api_id    = var.api_gateway_id
+  route_key = "POST /api-rds/_bulk"
+  target    = "integrations/${aws_apigatewayv2_integration.api_rds.id}"
+}
+
 resource "aws_apigatewayv2_route" "api_rds_get" {
   api_id    = var.api_gateway_id
   route_key = "GET /api-rds"
@@ -17,6 +17,10 @@ variable "db_secret_arn" {}
 
 variable "db_host" {}
 
+variable "db_reader_host" {
+  default = ""
+}
+
 variable "api_gateway_id" {}
 
 variable "api_gateway_execution_arn" {}
@@ -74,6 +74,12 @@ resource "aws_apigatewayv2_route" "api_todo_put_root" {
   target    = "integrations/${aws_apigatewayv2_integration.t5_api_todo_integration.id}"
 }
 
+resource "aws_apigatewayv2_route" "api_todo_delete_root" {
+  api_id    = var.api_gateway_id
+  route_key = "DELETE /api-todo"
+  target    = "integrations/${aws_apigatewayv2_integration.t5_api_todo_integration.id}"
+}
+
 resource "aws_apigatewayv2_route" "api_todo_delete" {
   api_id    = var.api_gateway_id
   route_key = "DELETE /api-todo/{id}"
@@ -110,11 +110,14 @@ resource "aws_iam_policy" "lambda_dynamodb_rw" {
         "dynamodb:UpdateItem",
         "dynamodb:Query",
         "dynamodb:Scan",
-        "dynamodb:DeleteItem"
+        "dynamodb:DeleteItem",
+        "dynamodb:BatchGetItem",
+        "dynamodb:BatchWriteItem"
       ],
       Resource = [
         var.dynamodb_health_table_arn,
-        var.dynamodb_todo_table_arn
+        var.dynamodb_todo_table_arn,
+        "${var.dynamodb_todo_table_arn}/index/*"
       ]
     }]
   })
@@ -210,6 +213,30 @@ resource "aws_iam_role_policy_attachment" "lambda_logs_query_policy_attach" {
   policy_arn = aws_iam_policy.lambda_logs_query_policy.arn
 }
 
+# Allow Lambdas to read the metrics they publish via Embedded Metric Format
+resource "aws_iam_policy" "lambda_metrics_read_policy" {
+  name        = "${var.project}-${var.env}-lambda-metrics-read"
+  description = "Allow Lambdas to read CloudWatch metrics"
+  policy = jsonencode({
+    Version = "2012-10-17",
+    Statement = [
+      {
+        Effect   = "Allow",
+        Action   = [
+          "cloudwatch:GetMetricData",
+          "cloudwatch:ListMetrics"
+        ],
+        Resource = "*"
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "lambda_metrics_read_policy_attach" {
+  role       = aws_iam_role.lambda_exec.name
+  policy_arn = aws_iam_policy.lambda_metrics_read_policy.arn
+}
+
 resource "aws_apigatewayv2_api" "api_gateway" {
   name          = "${var.project}-${var.env}-api"
   protocol_type = "HTTP"
@@ -226,8 +253,8 @@ allow_origins = [
 ]
 
     allow_methods  = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    allow_headers  = ["Content-Type", "Authorization"]
-    expose_headers = ["Content-Type"]
+    allow_headers  = ["Content-Type", "Authorization", "If-None-Match", "X-Consistent-Read"]
+    expose_headers = ["Content-Type", "ETag"]
     
     allow_credentials = true
     max_age        = 3600
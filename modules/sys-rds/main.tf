@@ -33,6 +33,19 @@ resource "aws_db_instance" "main" {
   password               = var.db_password
   skip_final_snapshot    = true
   publicly_accessible    = false
+  # Read replicas need automated backups on the source
+  backup_retention_period = var.read_replica_enabled ? 1 : null
+}
+
+# Optional streaming replica; api-rds sends GETs to it (DB_READER_HOST)
+resource "aws_db_instance" "replica" {
+  count                  = var.read_replica_enabled ? 1 : 0
+  identifier             = "${var.project}-postgres-replica"
+  replicate_source_db    = aws_db_instance.main.identifier
+  instance_class         = "db.t3.micro"
+  vpc_security_group_ids = [var.rds_sg_id]
+  skip_final_snapshot    = true
+  publicly_accessible    = false
 }
 
 resource "aws_secretsmanager_secret" "db_secret" {
@@ -6,6 +6,11 @@ output "db_host" {
   value = aws_db_instance.main.address
 }
 
+output "db_reader_host" {
+  # Empty when there is no replica; api-rds then reads from the writer
+  value = try(aws_db_instance.replica[0].address, "")
+}
+
 output "db_secret_arn" {
   value = aws_secretsmanager_secret.db_secret.arn
 }
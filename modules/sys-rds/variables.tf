@@ -15,3 +15,8 @@ variable "rds_sg_id" {}
 variable "private_subnet_ids" {
   type = list(string)
 }
+
+variable "read_replica_enabled" {
+  type    = bool
+  default = false
+}
@@ -1,20 +1,65 @@
+import base64
 import json
-import logging
-import boto3
+import os
 import time
 from datetime import datetime, timedelta
+from aws_clients import get_client, get_resource
+from request_logging import get_logger, log_request
+from timing import span
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-logs = boto3.client("logs")
+logger = get_logger()
 
 LOG_GROUP = "/aws/lambda/t5-api-log"
 
+DEFAULT_HOURS = 24
+MAX_HOURS = 24 * 7
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 1000
+CACHE_BUCKET_SECONDS = 60
+POLL_INITIAL_SECONDS = 0.1
+POLL_MAX_SECONDS = 1.0
+# Stop polling this long before the Lambda timeout and hand back the query id
+DEADLINE_MARGIN_MS = 2000
+
+# Optional shared cache across containers: a DynamoDB table with a "pk"
+# string hash key and TTL enabled on "ttl". Unset = container cache only.
+LOG_CACHE_TABLE = os.environ.get("LOG_CACHE_TABLE")
+
+_query_cache = {}
+
+MAX_EVENTS_PER_POST = 100
+# Client event times older than this (after correcting the client's clock
+# by its "sent" time) are taken as now; also keeps EMF timestamps in range
+MAX_EVENT_AGE_MS = 3600 * 1000
+
+# Embedded Metric Format: CloudWatch turns these log lines into metrics
+METRIC_NAMESPACE = "t5/api-log"
+METRIC_NAME = "Events"
+# Page and event come from an unauthenticated beacon and every distinct
+# dimension value is a billable custom metric, so only the dashboard's own
+# sections and tab labels are counted as themselves; anything else is
+# "other". The raw values are still in the log records.
+METRIC_PAGES = frozenset(os.environ.get(
+    "METRIC_PAGES", "cloudfront,cloudwatch,notify,queue,rds,terraform,todo,weather").split(","))
+METRIC_EVENTS = frozenset(os.environ.get(
+    "METRIC_EVENTS", "page_load,About,Home,Run_Test,Terraform_File,Python_File,VPC_Overview,API_Reference").split(","))
+ROOT_SEGMENTS = ("demo", "dash")
+OTHER = "other"
+DEFAULT_STATS_PERIOD = 3600
+
 '''
 curl -X GET https://api.aws-serverless.net/api-log \
   -H "Accept: application/json"
 
 curl "https://api.aws-serverless.net/api-log?page=/rds/&hours=12"
+curl "https://api.aws-serverless.net/api-log?event=page_load_rds&hours=48&limit=100"
+
+Results are cached per minute for the same filters.
+Async mode - start the query, then fetch results with the returned id:
+curl "https://api.aws-serverless.net/api-log?page=/rds/&async=true"
+# 202 {"status": "Running", "query_id": "..."}
+curl "https://api.aws-serverless.net/api-log?query_id=..."
+# 200 [...] once Complete, 202 {"status": "Running", ...} until then
 '''
 
 '''
@@ -26,24 +71,35 @@ curl -X POST https://api.aws-serverless.net/api-log \
 
 You can swap the payload easily, e.g.:
 -d '{"event": "page_load_home", "page": "/"}'
-'''
 
-def lambda_handler(event, context):
-    logger.info("==> Lambda triggered")
-    logger.info(f"Incoming event: {json.dumps(event)[:500]}")  # log first 500 chars for context
+Batched, up to 100 events per POST - what js/log.js sends via sendBeacon:
+the page once, and per event its name ("e"), client time in ms ("t") and a
+page ("p") only when it differs. "sent" is the client's clock at send time,
+used to correct event times for client clock skew.
+-d '{"page": "/rds/", "sent": 1792336700000, "events": [{"e": "page_load_rds", "t": 1792336690000}, {"e": "API_Reference", "t": 1792336695000}]}'
+# {"status": "ok", "accepted": 2}
+A bare array of {"event", "page"} objects is accepted too.
+'''
 
-    logger.info(f"Event raw keys: {list(event.keys())}")
-    logger.info(f"RequestContext: {json.dumps(event.get('requestContext', {}))}")
+'''
+Counts per page (or per event) from the pre-aggregated metrics, no log scan:
+curl "https://api.aws-serverless.net/api-log/stats?by=page&hours=24&period=3600"
+# {"by": "page", "period": 3600, "series": {"/rds/": {"total": 42, "buckets": [{"t": "...", "count": 3}, ...]}}}
+# Pages outside the dashboard sections and unknown events are counted as "other".
+'''
 
+@log_request
+def lambda_handler(event, context):
     method = event.get("requestContext", {}).get("http", {}).get("method", "UNKNOWN")
-    logger.info(f"HTTP method detected: {method}")
 
     if method == "POST":
         return handle_post(event)
+    elif method == "GET" and event.get("rawPath", "").endswith("/stats"):
+        return handle_stats(event)
     elif method == "GET":
-        return handle_get(event)
+        return handle_get(event, context)
     else:
-        logger.warning(f"Unsupported method: {method}")
+        logger.warning("Unsupported method: %s", method)
         return {"statusCode": 405, "body": json.dumps({"error": "Method not allowed"})}
 
 
@@ -51,119 +107,372 @@ def lambda_handler(event, context):
 # POST: Write Log Entry
 # -------------------------------------------------------
 def handle_post(event):
-    logger.info("==> handle_post called")
-
+    raw = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        raw = base64.b64decode(raw).decode("utf-8", "replace")
     try:
-        body = json.loads(event.get("body") or "{}")
+        body = json.loads(raw)
     except json.JSONDecodeError:
         body = {}
         logger.warning("Malformed JSON body; defaulting to empty dict")
 
+    # A single event object, a bare array of events, or {"page", "sent", "events": [...]}
+    batch = body if isinstance(body, dict) and isinstance(body.get("events"), list) else {}
+    if isinstance(body, list):
+        events = body
+    elif batch:
+        events = batch["events"]
+    else:
+        events = [body]
+    events = [e for e in events if isinstance(e, dict)][:MAX_EVENTS_PER_POST]
+
     request = event.get("requestContext", {}).get("http", {})
+    headers = event.get("headers") or {}
     ip = request.get("sourceIp", "unknown")
-    ua = event.get("headers", {}).get("user-agent", "unknown")
-    ref = event.get("headers", {}).get("referer", "")
-    ev = body.get("event", "unknown_event")
-    page = body.get("page", "unknown_page")
-
-    # log_entry = {
-    #     "timestamp": datetime.utcnow().isoformat() + "Z",
-    #     "ip": ip,
-    #     "event": ev,
-    #     "page": page,
-    #     "user_agent": ua,
-    #     "referer": ref
-    # }
-
-    log_entry = {
-        "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-        "ip": ip,
-        "event": ev,
-        "page": page,
-        "user_agent": ua,
-        "referer": ref
+    ua = headers.get("user-agent", "unknown")
+    ref = headers.get("referer", "")
+    now_ms = int(time.time() * 1000)
+    sent = batch.get("sent")
+    skew_ms = now_ms - sent if is_number(sent) else 0
+
+    records = []
+    for item in events:
+        records.append({
+            "ts": event_time(item.get("t"), skew_ms, now_ms),
+            "ip": ip,
+            "event": item.get("e", item.get("event", "unknown_event")),
+            "page": item.get("p") or item.get("page") or batch.get("page") or "unknown_page",
+            "user_agent": ua,
+            "referer": ref,
+        })
+    # Written in the order the events happened, whatever order they came in
+    records.sort(key=lambda r: r["ts"])
+
+    # The metric counts ride on the first record of each (page, event,
+    # minute), so an event costs one log line and a batch no extra ones
+    groups = {}
+    for record in records:
+        key = (metric_page(record["page"]), metric_event(record["event"]), record["ts"] // 60000)
+        groups.setdefault(key, []).append(record)
+    for (page, ev, _), group in groups.items():
+        group[0].update(metric_fields(page, ev, len(group), group[0]["ts"]))
+
+    for record in records:
+        # Bare JSON lines, as EMF requires; the Logs Insights query parses the
+        # default ": " separators
+        print(json.dumps(record))
+
+    return {
+        "statusCode": 200,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps({"status": "ok", "accepted": len(events)})
     }
 
 
-    logger.info(f"Writing log entry: {json.dumps(log_entry)}")
+def metric_page(page):
+    """"/rds/" for any path ending in a known section, "/" for the dashboard root."""
+    parts = [p for p in str(page).split("/") if p and p != "index.html"]
+    if all(p in ROOT_SEGMENTS for p in parts):
+        return "/"
+    return f"/{parts[-1]}/" if parts[-1] in METRIC_PAGES else OTHER
+
+
+def metric_event(ev):
+    # page_load_<path> is one event per page; the Page dimension already says which
+    ev = str(ev)
+    if ev.startswith("page_load"):
+        return "page_load"
+    return ev if ev in METRIC_EVENTS else OTHER
+
+
+def dimension_values(dimension):
+    if dimension == "Page":
+        return ["/"] + sorted(f"/{p}/" for p in METRIC_PAGES) + [OTHER]
+    return sorted(METRIC_EVENTS) + [OTHER]
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
 
-    # This is what writes to CloudWatch for later query
-    logger.info(json.dumps(log_entry))
 
+def event_time(client_ms, skew_ms, now_ms):
+    """The event's client time moved onto the server clock; now if missing or implausible."""
+    if not is_number(client_ms):
+        return now_ms
+    ts = int(client_ms + skew_ms)
+    return ts if now_ms - MAX_EVENT_AGE_MS <= ts <= now_ms else now_ms
+
+
+def metric_fields(page, ev, count, ts):
+    # Embedded Metric Format: one count per (Page) and per (Event) dimension set
     return {
-        "statusCode": 200,
-        "headers": {"Content-Type": "application/json"},
-        "body": json.dumps({"status": "ok"})
+        "_aws": {
+            "Timestamp": ts,
+            "CloudWatchMetrics": [{
+                "Namespace": METRIC_NAMESPACE,
+                "Dimensions": [["Page"], ["Event"]],
+                "Metrics": [{"Name": METRIC_NAME, "Unit": "Count"}],
+            }],
+        },
+        "Page": page,
+        "Event": ev,
+        METRIC_NAME: count,
     }
 
 
 # -------------------------------------------------------
-# GET: Read Logs
+# GET /stats: Counts from metrics
 # -------------------------------------------------------
-def handle_get(event):
-    logger.info("==> handle_get called")
-
-    query = """
-    fields @timestamp, @message
-    | parse @message '"ip": "*"' as ip
-    | parse @message '"event": "*"' as event
-    | parse @message '"page": "*"' as page
-    | parse @message '"user_agent": "*"' as user_agent
-    | parse @message '"referer": "*"' as referer
-    | filter ispresent(ip) and ip != "unknown"
-    | sort @timestamp desc
-    | limit 25
-    """
-
-    start = int((time.time() - 86400) * 1000)  # last 24h
-    end = int(time.time() * 1000)
-    logger.info(f"Running Logs Insights query on {LOG_GROUP} from {start} to {end}")
+def handle_stats(event):
+    params = event.get("queryStringParameters") or {}
+    dimension = {"page": "Page", "event": "Event"}.get((params.get("by") or "page").lower())
+    if not dimension:
+        return _json(400, {"error": "by must be 'page' or 'event'"})
+    try:
+        hours = max(1, min(int(params.get("hours") or DEFAULT_HOURS), MAX_HOURS))
+        period = max(60, int(params.get("period") or DEFAULT_STATS_PERIOD)) // 60 * 60
+    except ValueError:
+        return _json(400, {"error": "hours and period must be integers"})
 
+    key = f"stats#{int(time.time()) // CACHE_BUCKET_SECONDS}#{dimension}#{hours}#{period}"
     try:
-        q = logs.start_query(
-            logGroupName=LOG_GROUP,
-            startTime=start,
-            endTime=end,
-            queryString=query
-        )
-        qid = q["queryId"]
-        logger.info(f"Started query: {qid}")
+        cached = cache_get(key)
+        if cached is not None:
+            return _json(200, cached)
+
+        # A fixed, bounded set; no ListMetrics over whatever was ever sent
+        values = dimension_values(dimension)
+        end = datetime.utcnow()
+        start = end - timedelta(hours=hours)
+        series = {}
+        # GetMetricData takes at most 500 queries per call
+        for i in range(0, len(values), 500):
+            chunk = values[i:i + 500]
+            queries = [{
+                "Id": f"m{n}",
+                "Label": value,
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": METRIC_NAMESPACE,
+                        "MetricName": METRIC_NAME,
+                        "Dimensions": [{"Name": dimension, "Value": value}],
+                    },
+                    "Period": period,
+                    "Stat": "Sum",
+                },
+            } for n, value in enumerate(chunk)]
+            paginator = get_client("cloudwatch").get_paginator("get_metric_data")
+            for page in paginator.paginate(MetricDataQueries=queries, StartTime=start, EndTime=end,
+                                           ScanBy="TimestampAscending"):
+                for result in page["MetricDataResults"]:
+                    entry = series.setdefault(result["Label"], {"total": 0, "buckets": []})
+                    for ts, val in zip(result["Timestamps"], result["Values"]):
+                        entry["buckets"].append({"t": ts.isoformat(), "count": int(val)})
+                        entry["total"] += int(val)
+
+        series = {k: v for k, v in series.items() if v["total"]}
+        result = {"by": dimension.lower(), "hours": hours, "period": period, "series": series}
+        cache_put(key, result)
+        return _json(200, result)
 
-        # Poll until complete
-        while True:
-            res = logs.get_query_results(queryId=qid)
-            status = res.get("status")
-            logger.info(f"Query status: {status}")
-            if status in ["Complete", "Failed", "Cancelled"]:
-                break
-            time.sleep(1)
+    except Exception as e:
+        logger.exception("Error reading metrics: %s", e)
+        return _json(500, {"error": str(e)})
+
+
+# -------------------------------------------------------
+# GET: Read Logs
+# -------------------------------------------------------
+def _json(status, body):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(body)
+    }
 
-        logger.info(f"Query result count: {len(res.get('results', []))}")
 
-        # After res = logs.get_query_results(...)
-        # Flatten CloudWatch response
-        clean = []
-        for row in res.get("results", []):
-            entry = {}
-            for field in row:
-                entry[field["field"]] = field["value"]
-            clean.append(entry)
+def _quote(value):
+    # Logs Insights string literal
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
 
-        # Sort by timestamp descending
-        clean.sort(key=lambda x: x.get("@timestamp", ""), reverse=True)
 
-        logger.info("NEW CODE WORKING")
+def build_query(page=None, ev=None, limit=DEFAULT_LIMIT):
+    lines = [
+        "fields @timestamp, @message",
+        "| parse @message '\"ts\": *,' as ts",
+        "| parse @message '\"ip\": \"*\"' as ip",
+        "| parse @message '\"event\": \"*\"' as event",
+        "| parse @message '\"page\": \"*\"' as page",
+        "| parse @message '\"user_agent\": \"*\"' as user_agent",
+        "| parse @message '\"referer\": \"*\"' as referer",
+        '| filter ispresent(ip) and ip != "unknown"',
+    ]
+    if page:
+        lines.append(f"| filter page = {_quote(page)}")
+    if ev:
+        lines.append(f"| filter event = {_quote(ev)}")
+    lines += ["| sort @timestamp desc", f"| limit {limit}"]
+    return "\n".join(lines)
 
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps(clean, indent=2)
-        }
+
+def parse_get_params(params):
+    try:
+        hours = int(params.get("hours") or DEFAULT_HOURS)
+        limit = int(params.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError("hours and limit must be integers")
+    return {
+        "hours": max(1, min(hours, MAX_HOURS)),
+        "limit": max(1, min(limit, MAX_LIMIT)),
+        "page": params.get("page") or None,
+        "event": params.get("event") or None,
+    }
+
+
+def cache_key(filters, bucket):
+    return f"logq#{bucket}#{filters['hours']}#{filters['limit']}#{filters['page'] or ''}#{filters['event'] or ''}"
+
+
+def cache_get(key):
+    entry = _query_cache.get(key)
+    if entry and entry[0] > time.time():
+        return entry[1]
+    if LOG_CACHE_TABLE:
+        # The shared tier is optional: if DynamoDB fails, run the query instead
+        try:
+            item = _cache_table().get_item(Key={"pk": key}).get("Item")
+        except Exception as e:
+            logger.warning("Shared query cache read failed: %s", e)
+            return None
+        if item and int(item["ttl"]) > time.time():
+            rows = json.loads(item["rows"])
+            _query_cache[key] = (int(item["ttl"]), rows)
+            return rows
+    return None
+
+
+def cache_put(key, rows):
+    expires = int(time.time()) + CACHE_BUCKET_SECONDS
+    # Keep the container cache from growing without bound across buckets
+    for k in [k for k, v in _query_cache.items() if v[0] <= time.time()]:
+        del _query_cache[k]
+    _query_cache[key] = (expires, rows)
+    payload = json.dumps(rows)
+    # DynamoDB items max out at 400 KB; big result sets stay container-local
+    if LOG_CACHE_TABLE and len(payload) < 350_000:
+        try:
+            _cache_table().put_item(Item={"pk": key, "ttl": expires, "rows": payload})
+        except Exception as e:
+            logger.warning("Shared query cache write failed: %s", e)
+
+
+def remember_query(qid, key):
+    # A query answered with 202 is picked up later by query_id alone; keep
+    # its cache key so the results can be cached then
+    cache_put("logq-pending#" + qid, key)
+
+
+_dynamo_table = None
+
+
+def _cache_table():
+    global _dynamo_table
+    if _dynamo_table is None:
+        _dynamo_table = get_resource("dynamodb").Table(LOG_CACHE_TABLE)
+    return _dynamo_table
+
+
+def flatten_results(res):
+    clean = []
+    for row in res.get("results", []):
+        entry = {}
+        for field in row:
+            entry[field["field"]] = field["value"]
+        clean.append(entry)
+    # Sort by timestamp descending
+    clean.sort(key=lambda x: x.get("@timestamp", ""), reverse=True)
+    return clean
+
+
+def wait_for_query(qid, context):
+    """Poll with growing intervals until the query finishes or the deadline nears."""
+    delay = POLL_INITIAL_SECONDS
+    while True:
+        res = get_client("logs").get_query_results(queryId=qid)
+        status = res.get("status")
+        if status in ["Complete", "Failed", "Cancelled", "Timeout"]:
+            return res
+        remaining_ms = context.get_remaining_time_in_millis() if context else 60000
+        if remaining_ms - delay * 1000 < DEADLINE_MARGIN_MS:
+            return res
+        time.sleep(delay)
+        delay = min(delay * 1.5, POLL_MAX_SECONDS)
+
+
+def handle_get(event, context=None):
+    params = event.get("queryStringParameters") or {}
+
+    try:
+        # Fetch results of a query started earlier in async mode
+        if params.get("query_id"):
+            res = get_client("logs").get_query_results(queryId=params["query_id"])
+            status = res.get("status")
+            if status != "Complete":
+                return _json(202 if status in ["Scheduled", "Running"] else 500,
+                             {"status": status, "query_id": params["query_id"]})
+            clean = flatten_results(res)
+            key = cache_get("logq-pending#" + params["query_id"])
+            if key:
+                cache_put(key, clean)
+            return _json(200, clean)
+
+        try:
+            filters = parse_get_params(params)
+        except ValueError as e:
+            return _json(400, {"error": str(e)})
+
+        # Align the window to the cache bucket so every request in the same
+        # minute runs (and caches) the identical query
+        bucket = int(time.time()) // CACHE_BUCKET_SECONDS
+        end = bucket * CACHE_BUCKET_SECONDS
+        start = end - filters["hours"] * 3600
+        key = cache_key(filters, bucket)
+
+        cached = cache_get(key)
+        if cached is not None:
+            logger.info("Query cache hit: %s", key)
+            return _json(200, cached)
+
+        logger.info("Running Logs Insights query on %s with %s", LOG_GROUP, filters)
+        q = get_client("logs").start_query(
+            logGroupName=LOG_GROUP,
+            startTime=start * 1000,
+            endTime=end * 1000,
+            queryString=build_query(filters["page"], filters["event"], filters["limit"])
+        )
+        qid = q["queryId"]
+        logger.info("Started query: %s", qid)
+
+        if str(params.get("async", "")).lower() in ("1", "true", "yes"):
+            remember_query(qid, key)
+            return _json(202, {"status": "Running", "query_id": qid})
+
+        # The get_query_results calls are timed individually; this is the whole wait
+        with span("logs.insights_wait"):
+            res = wait_for_query(qid, context)
+        status = res.get("status")
+        if status in ["Scheduled", "Running"]:
+            # Out of time; let the client pick the results up later
+            remember_query(qid, key)
+            return _json(202, {"status": status, "query_id": qid})
+        if status != "Complete":
+            return _json(500, {"error": f"Query {status}", "query_id": qid})
+
+        clean = flatten_results(res)
+        logger.info("Query result count: %d", len(clean))
+        cache_put(key, clean)
+        return _json(200, clean)
 
     except Exception as e:
-        logger.exception(f"Error running CloudWatch query: {str(e)}")
-        return {
-            "statusCode": 500,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({"error": str(e)})
-        }
\ No newline at end of file
+        logger.exception("Error running CloudWatch query: %s", e)
+        return _json(500, {"error": str(e)})
@@ -1,5 +1,8 @@
-import json, boto3, os, logging
+import base64, json, os, random, time
 from datetime import datetime
+from aws_clients import get_client
+from request_logging import get_logger, log_request
+from ttl_cache import TTLCache
 
 '''
 curl -X POST https://api.aws-serverless.net/api-notify \
@@ -13,6 +16,25 @@ curl -X POST https://api.aws-serverless.net/api-notify \
 #   "message": "Test notification from curl"
 # }
 
+'''
+Batch publish - up to 100 messages per request, sent to SNS 10 at a time.
+"subject" and "attributes" are optional (also on the single form above);
+attributes let subscribers filter server-side with a filter policy.
+
+curl -X POST https://api.aws-serverless.net/api-notify \
+  -H "Content-Type: application/json" \
+  -d '{"messages": [
+        "plain text",
+        {"message": "Disk almost full", "subject": "Alert", "attributes": {"severity": "high", "host_count": 3}},
+        {"message": "Nightly job done", "attributes": {"tags": ["batch", "nightly"]}}
+      ]}'
+'''
+
+# {
+#   "results": [{"index": 0, "status": "ok", "message_id": "..."}, ...],
+#   "failed": 0
+# }
+
 '''
 curl -X GET https://api.aws-serverless.net/api-notify \
   -H "Content-Type: application/json"
@@ -23,6 +45,20 @@ curl -X GET https://api.aws-serverless.net/api-notify \
 #   "subscriptions": [...]
 # }
 
+'''
+Every subscription is returned (all SNS pages), served from a short-lived
+container cache. Page through it with limit / next_token:
+
+curl "https://api.aws-serverless.net/api-notify?limit=50"
+curl "https://api.aws-serverless.net/api-notify?limit=50&next_token=eyJvZmZzZXQiOiA1MH0"
+'''
+
+# {
+#   "count": 1234,
+#   "subscriptions": [...50...],
+#   "next_token": "..."      (null on the last page)
+# }
+
 '''
 curl -X PUT https://api.aws-serverless.net/api-notify \
   -H "Content-Type: application/json" \
@@ -45,12 +81,25 @@ curl -X DELETE https://api.aws-serverless.net/api-notify \
 #   "subscription_arn": "arn:aws:sns:..."
 # }
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
-sns = boto3.client("sns")
 TOPIC_ARN = os.environ["TOPIC_ARN"]
 
+# PublishBatch takes 10 entries and 256 KiB in total per call
+SNS_BATCH_SIZE = 10
+MAX_BATCH_BYTES = 256 * 1024
+MAX_BATCH_ENTRIES = 100
+MAX_BATCH_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 1.0
+
+# Full subscription list per topic; PUT/DELETE in this container invalidate it,
+# other containers catch up within the TTL
+SUBSCRIPTION_CACHE_TTL_SECONDS = int(os.environ.get("SUBSCRIPTION_CACHE_TTL_SECONDS", "30"))
+MAX_PAGE_LIMIT = 1000
+
+_subscription_cache = TTLCache(SUBSCRIPTION_CACHE_TTL_SECONDS, max_entries=16)
+
 COMMON_HEADERS = {
     "Content-Type": "application/json",
     "Access-Control-Allow-Origin": "*",
@@ -65,10 +114,130 @@ def response(code, body):
         "body": json.dumps(body)
     }
 
+# --- Publishing ---
+def message_attributes(attrs):
+    """{"name": value} -> SNS MessageAttributes; numbers become Number, lists String.Array."""
+    out = {}
+    for name, value in (attrs or {}).items():
+        if isinstance(value, bool):
+            out[name] = {"DataType": "String", "StringValue": "true" if value else "false"}
+        elif isinstance(value, str):
+            out[name] = {"DataType": "String", "StringValue": value}
+        elif isinstance(value, (int, float)):
+            out[name] = {"DataType": "Number", "StringValue": str(value)}
+        elif isinstance(value, list):
+            out[name] = {"DataType": "String.Array", "StringValue": json.dumps(value)}
+        else:
+            raise ValueError(f"Unsupported value for attribute '{name}'")
+    return out
+
+def publish_entry(item):
+    if isinstance(item, str):
+        return {"Message": item}
+    if not isinstance(item, dict):
+        raise ValueError("Each message must be a string or an object")
+    entry = {"Message": item.get("message", "Hello from API-NOTIFY!")}
+    if item.get("subject"):
+        entry["Subject"] = item["subject"]
+    if item.get("attributes"):
+        entry["MessageAttributes"] = message_attributes(item["attributes"])
+    return entry
+
+def entry_size(entry):
+    size = len(entry["Message"].encode()) + len(entry.get("Subject", "").encode())
+    for name, attr in entry.get("MessageAttributes", {}).items():
+        size += len(name) + len(attr["DataType"]) + len(attr["StringValue"].encode())
+    return size
+
+def chunk_entries(entries):
+    chunk, size = [], 0
+    for entry in entries:
+        n = entry_size(entry)
+        if chunk and (len(chunk) == SNS_BATCH_SIZE or size + n > MAX_BATCH_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(entry)
+        size += n
+    if chunk:
+        yield chunk
+
+def backoff(attempt):
+    time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+def publish_batch(entries):
+    """PublishBatch in chunks of 10, retrying entries that failed on the SNS side."""
+    results = [None] * len(entries)
+    indexed = [dict(entry, Id=str(i)) for i, entry in enumerate(entries)]
+
+    for chunk in chunk_entries(indexed):
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            res = get_client("sns").publish_batch(TopicArn=TOPIC_ARN, PublishBatchRequestEntries=chunk)
+            for ok in res.get("Successful", []):
+                i = int(ok["Id"])
+                results[i] = {"index": i, "status": "ok", "message_id": ok.get("MessageId")}
+            retry = []
+            for failed in res.get("Failed", []):
+                i = int(failed["Id"])
+                if failed.get("SenderFault"):
+                    results[i] = {"index": i, "status": "error", "error": failed.get("Message") or failed["Code"]}
+                else:
+                    retry.append(indexed[i])
+            chunk = retry
+            if not chunk:
+                break
+            logger.info("%d publish(es) failed, retry %d", len(chunk), attempt + 1)
+            backoff(attempt)
+        for entry in chunk:
+            i = int(entry["Id"])
+            results[i] = {"index": i, "status": "error", "error": "Failed after retries"}
+
+    return {"results": results, "failed": sum(1 for r in results if r["status"] == "error")}
+
+# --- Subscriptions ---
+def list_subscriptions():
+    subs = _subscription_cache.get(TOPIC_ARN)
+    if subs is not None:
+        return subs
+    subs = []
+    paginator = get_client("sns").get_paginator("list_subscriptions_by_topic")
+    for page in paginator.paginate(TopicArn=TOPIC_ARN):
+        subs.extend(page.get("Subscriptions", []))
+    logger.info("Listed %d subscription(s) from SNS", len(subs))
+    _subscription_cache.put(TOPIC_ARN, subs)
+    return subs
+
+def encode_token(offset):
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+def decode_token(token):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+    except Exception:
+        raise ValueError("Invalid next_token")
+    # Only ever an offset we issued: a negative one would slice from the end of the list
+    if type(offset) is not int or offset < 0:
+        raise ValueError("Invalid next_token")
+    return offset
+
+def subscriptions_page(params):
+    subs = list_subscriptions()
+    if "limit" not in params and "next_token" not in params:
+        return {"count": len(subs), "subscriptions": subs}
+    limit = max(1, min(int(params.get("limit") or MAX_PAGE_LIMIT), MAX_PAGE_LIMIT))
+    # Offsets index the cached snapshot; an unsubscribe between pages may shift them by one
+    offset = decode_token(params["next_token"]) if params.get("next_token") else 0
+    end = offset + limit
+    return {
+        "count": len(subs),
+        "subscriptions": subs[offset:end],
+        "next_token": encode_token(end) if end < len(subs) else None
+    }
+
+@log_request
 def lambda_handler(event, context):
     method = event.get("requestContext", {}).get("http", {}).get("method", "")
-    logger.info(f"Incoming method: {method}")
-    logger.info(f"Event: {json.dumps(event)}")
+    logger.info("Incoming method: %s", method)
 
     # --- Handle preflight ---
     if method == "OPTIONS":
@@ -84,8 +253,16 @@ def lambda_handler(event, context):
     try:
         match method:
             case "POST":
-                message = body.get("message", "Hello from API-NOTIFY!")
-                resp = sns.publish(TopicArn=TOPIC_ARN, Message=message)
+                items = body if isinstance(body, list) else body.get("messages")
+                if items is not None:
+                    if not isinstance(items, list) or not 1 <= len(items) <= MAX_BATCH_ENTRIES:
+                        return response(400, {"error": f"Batch must contain 1 to {MAX_BATCH_ENTRIES} messages"})
+                    logger.info("Publishing batch of %d message(s)", len(items))
+                    return response(200, publish_batch([publish_entry(i) for i in items]))
+
+                entry = publish_entry(body)
+                message = entry["Message"]
+                resp = get_client("sns").publish(TopicArn=TOPIC_ARN, **entry)
                 return response(200, {
                     "status": "published",
                     "message_id": resp.get("MessageId"),
@@ -93,15 +270,16 @@ def lambda_handler(event, context):
                 })
 
             case "GET":
-                subs = sns.list_subscriptions_by_topic(TopicArn=TOPIC_ARN).get("Subscriptions", [])
-                return response(200, {"count": len(subs), "subscriptions": subs})
+                params = event.get("queryStringParameters") or {}
+                return response(200, subscriptions_page(params))
 
             case "PUT":
                 protocol = body.get("protocol", "email")
                 endpoint = body.get("endpoint")
                 if not endpoint:
                     return response(400, {"error": "Missing 'endpoint'"})
-                sub = sns.subscribe(TopicArn=TOPIC_ARN, Protocol=protocol, Endpoint=endpoint)
+                sub = get_client("sns").subscribe(TopicArn=TOPIC_ARN, Protocol=protocol, Endpoint=endpoint)
+                _subscription_cache.invalidate(TOPIC_ARN)
                 arn = sub.get("SubscriptionArn", "PENDING_CONFIRMATION")
                 return response(200, {"status": "subscribed", "subscription_arn": arn})
 
@@ -109,12 +287,17 @@ def lambda_handler(event, context):
                 arn = body.get("subscription_arn")
                 if not arn:
                     return response(400, {"error": "Missing 'subscription_arn'"})
-                sns.unsubscribe(SubscriptionArn=arn)
+                get_client("sns").unsubscribe(SubscriptionArn=arn)
+                _subscription_cache.invalidate(TOPIC_ARN)
                 return response(200, {"status": "unsubscribed", "subscription_arn": arn})
 
             case _:
                 return response(405, {"error": f"Method {method} not allowed"})
 
+    except ValueError as e:
+        logger.warning("Bad request: %s", e)
+        return response(400, {"error": str(e)})
+
     except Exception as e:
         logger.exception("Unhandled exception")
         return response(500, {"error": str(e)})
@@ -0,0 +1,150 @@
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from request_logging import get_logger, lazy_json, log_request
+
+'''
+Second entry point in the api-queue package (handler "consumer.lambda_handler"),
+invoked by the SQS event source mapping instead of API Gateway.
+
+Records in a batch are processed concurrently on a bounded worker pool and
+only the ones that failed are returned in batchItemFailures, so SQS retries
+just those (the mapping needs ReportBatchItemFailures).
+
+Messages sharing a FIFO MessageGroupId are processed in order on one worker;
+once one fails, the rest of its group is reported failed too.
+
+What processing means is up to CONSUMER_HANDLER, "module:function" in this
+package, called as function(payload, record) with the JSON-decoded body (or
+the raw string). Until it is set nothing is acknowledged: every record is
+handed back to SQS, so enabling the consumer cannot silently drain the queue.
+Terraform (consumer_handler in modules/api-queue, queue_consumer_handler in
+envs/dev) sets it, and refuses to enable the event source mapping without it.
+'''
+
+logger = get_logger()
+
+MAX_WORKERS = int(os.environ.get("CONSUMER_WORKERS", "8"))
+CONSUMER_HANDLER = os.environ.get("CONSUMER_HANDLER", "")
+# Records not started with less than this left are handed back to SQS untouched
+DEADLINE_MARGIN_MS = 2000
+
+# Embedded Metric Format, as in api-log
+METRIC_NAMESPACE = "t5/api-queue"
+# EMF accepts at most 100 values per metric in one line
+MAX_METRIC_VALUES = 100
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+
+def load_handler(spec):
+    """The function named by a "module:function" spec, or None if spec is empty."""
+    if not spec:
+        return None
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"CONSUMER_HANDLER must be module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+# Resolved at cold start, so a bad setting fails the first batch loudly
+_handler = load_handler(CONSUMER_HANDLER)
+
+
+def process_message(record):
+    """Handles one SQS record; raise to have it retried."""
+    body = record.get("body", "")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = body
+    _handler(payload, record)
+    logger.debug("Processed message %s: %s", record["messageId"], lazy_json(payload))
+
+
+def group_records(records):
+    """FIFO records grouped by MessageGroupId (in order); standard-queue records stand alone."""
+    groups = {}
+    for record in records:
+        group_id = record.get("attributes", {}).get("MessageGroupId")
+        groups.setdefault(group_id or record["messageId"], []).append(record)
+    return list(groups.values())
+
+
+def process_group(records, time_left_ms):
+    """Returns ([failed message ids], [processing ms per processed record])."""
+    failed, timings = [], []
+    for i, record in enumerate(records):
+        if time_left_ms() < DEADLINE_MARGIN_MS:
+            logger.warning("Near timeout, returning %d record(s) unprocessed", len(records) - i)
+            failed.extend(r["messageId"] for r in records[i:])
+            break
+        t0 = time.perf_counter()
+        try:
+            process_message(record)
+        except Exception:
+            logger.exception("Failed to process message %s", record["messageId"])
+            # Keep FIFO order: nothing after a failure in the same group may succeed
+            failed.extend(r["messageId"] for r in records[i:])
+            break
+        finally:
+            timings.append((time.perf_counter() - t0) * 1000)
+    return failed, timings
+
+
+def emit_metrics(batch_size, failed, batch_ms, timings, max_age_ms):
+    # EMF must be a bare JSON line, so it bypasses the logger's prefix
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRIC_NAMESPACE,
+                "Dimensions": [[]],
+                "Metrics": [
+                    {"Name": "BatchSize", "Unit": "Count"},
+                    {"Name": "FailedMessages", "Unit": "Count"},
+                    {"Name": "BatchDuration", "Unit": "Milliseconds"},
+                    {"Name": "ProcessingTime", "Unit": "Milliseconds"},
+                    {"Name": "MessageAge", "Unit": "Milliseconds"},
+                ],
+            }],
+        },
+        "BatchSize": batch_size,
+        "FailedMessages": failed,
+        "BatchDuration": round(batch_ms, 3),
+        "ProcessingTime": [round(t, 3) for t in timings[:MAX_METRIC_VALUES]],
+        "MessageAge": max_age_ms,
+    }))
+
+
+@log_request
+def lambda_handler(event, context):
+    t0 = time.perf_counter()
+    records = event.get("Records", [])
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        time_left_ms = context.get_remaining_time_in_millis
+    else:
+        time_left_ms = lambda: float("inf")  # noqa: E731
+
+    now_ms = int(time.time() * 1000)
+    sent = [int(r.get("attributes", {}).get("SentTimestamp", now_ms)) for r in records]
+    max_age_ms = now_ms - min(sent) if sent else 0
+
+    if _handler is None:
+        logger.warning("CONSUMER_HANDLER not set, returning %d record(s) unprocessed", len(records))
+        emit_metrics(len(records), len(records), (time.perf_counter() - t0) * 1000, [], max_age_ms)
+        return {"batchItemFailures": [{"itemIdentifier": r["messageId"]} for r in records]}
+
+    failed, timings = [], []
+    futures = [_pool.submit(process_group, group, time_left_ms) for group in group_records(records)]
+    for future in futures:
+        group_failed, group_timings = future.result()
+        failed.extend(group_failed)
+        timings.extend(group_timings)
+
+    batch_ms = (time.perf_counter() - t0) * 1000
+    logger.info("Processed batch of %d record(s) in %.1fms, %d failed", len(records), batch_ms, len(failed))
+    emit_metrics(len(records), len(failed), batch_ms, timings, max_age_ms)
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]}
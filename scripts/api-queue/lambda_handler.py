@@ -1,7 +1,9 @@
 import os
 import json
-import boto3
-import logging
+import random
+import time
+from aws_clients import get_client
+from request_logging import get_logger, lazy_json, log_request
 
 '''
 curl -s -X POST \
@@ -27,65 +29,206 @@ curl -s -X GET \
   "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-queue"
 '''
 
+'''
+Batch forms - up to 100 entries per request, sent to SQS 10 at a time
+
+curl -s -X POST -H "Content-Type: application/json" \
+  -d '{"messages": ["first", {"message": "second", "delaySeconds": 5}]}' \
+  "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-queue"
+# {"results": [{"index": 0, "status": "ok", "messageId": "..."}, ...], "failed": 0}
+
+curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-queue?max=50&wait=10"
+# Long-polls up to 10 s for the first messages, then drains up to 50 without waiting
+
+curl -s -X DELETE -H "Content-Type: application/json" \
+  -d '{"receiptHandles": ["HANDLE_1", "HANDLE_2"]}' \
+  "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-queue"
+
+curl -s -X PUT -H "Content-Type: application/json" \
+  -d '{"entries": [{"receiptHandle": "HANDLE_1", "visibilityTimeout": 60}]}' \
+  "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-queue"
+'''
+
 # --- Logging setup ---
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
-sqs = boto3.client("sqs")
 QUEUE_URL = os.environ.get("QUEUE_URL")
 
+# SQS allows 10 entries per batch call and a 20 s long poll; the wait is
+# capped lower so a full poll still fits in the 15 s Lambda timeout.
+SQS_BATCH_SIZE = 10
+MAX_BATCH_BYTES = 256 * 1024
+MAX_BATCH_ENTRIES = 100
+MAX_RECEIVE = 100
+MAX_WAIT_SECONDS = 10
+RECEIVE_VISIBILITY_TIMEOUT = 20
+MAX_BATCH_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 1.0
+
+
+# --- Batch helpers ---
+def backoff(attempt):
+    # Full jitter, as in api-todo
+    time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+def chunk_entries(entries):
+    """Split into SQS batches of at most 10 entries and 256 KiB of message bodies."""
+    chunk, size = [], 0
+    for entry in entries:
+        entry_size = len(entry.get("MessageBody", "").encode())
+        if chunk and (len(chunk) == SQS_BATCH_SIZE or size + entry_size > MAX_BATCH_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(entry)
+        size += entry_size
+    if chunk:
+        yield chunk
+
+def batch_call(operation, entries):
+    """
+    Runs an SQS *_batch operation over entries (no Ids needed), keeping
+    request order. Entries that fail on the SQS side are retried; sender
+    faults are reported as-is. Returns {"results": [...], "failed": n}.
+    """
+    call = getattr(get_client("sqs"), operation)
+    results = [None] * len(entries)
+    indexed = [dict(entry, Id=str(i)) for i, entry in enumerate(entries)]
+
+    for chunk in chunk_entries(indexed):
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            res = call(QueueUrl=QUEUE_URL, Entries=chunk)
+            for ok in res.get("Successful", []):
+                i = int(ok["Id"])
+                results[i] = {"index": i, "status": "ok"}
+                if "MessageId" in ok:
+                    results[i]["messageId"] = ok["MessageId"]
+            retry = []
+            for failed in res.get("Failed", []):
+                i = int(failed["Id"])
+                if failed.get("SenderFault"):
+                    results[i] = {"index": i, "status": "error", "error": failed.get("Message") or failed["Code"]}
+                else:
+                    retry.append(indexed[i])
+            chunk = retry
+            if not chunk:
+                break
+            logger.info("%s: %d entries failed, retry %d", operation, len(chunk), attempt + 1)
+            backoff(attempt)
+        for entry in chunk:
+            i = int(entry["Id"])
+            results[i] = {"index": i, "status": "error", "error": "Failed after retries"}
+
+    return {"results": results, "failed": sum(1 for r in results if r["status"] == "error")}
+
+def batch_items(body, key):
+    """The batch in a request body - a bare JSON array or {key: [...]} - or None."""
+    items = body if isinstance(body, list) else body.get(key)
+    if items is None:
+        return None
+    if not isinstance(items, list) or not 1 <= len(items) <= MAX_BATCH_ENTRIES:
+        raise ValueError(f"Batch must contain 1 to {MAX_BATCH_ENTRIES} entries")
+    return items
+
+def send_entry(item):
+    if isinstance(item, str):
+        return {"MessageBody": item}
+    entry = {"MessageBody": item.get("message", "no message")}
+    if "delaySeconds" in item:
+        entry["DelaySeconds"] = int(item["delaySeconds"])
+    return entry
+
+def visibility_entry(item):
+    return {"ReceiptHandle": item["receiptHandle"], "VisibilityTimeout": int(item.get("visibilityTimeout", 30))}
+
+def receive_messages(max_messages, wait_seconds):
+    """Long-polls for the first batch, then drains without waiting until max or empty."""
+    messages = []
+    wait = wait_seconds
+    while len(messages) < max_messages:
+        resp = get_client("sqs").receive_message(
+            QueueUrl=QUEUE_URL,
+            MaxNumberOfMessages=min(SQS_BATCH_SIZE, max_messages - len(messages)),
+            VisibilityTimeout=RECEIVE_VISIBILITY_TIMEOUT,
+            WaitTimeSeconds=wait
+        )
+        batch = resp.get("Messages", [])
+        if not batch:
+            break
+        messages.extend(batch)
+        wait = 0
+    return messages
+
+def int_param(qs, name, default, low, high):
+    raw = qs.get(name)
+    if raw is None:
+        return default
+    value = int(raw)
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+@log_request
 def lambda_handler(event, context):
-    logger.info(f"Event received: {json.dumps(event)}")
 
     method = event["requestContext"]["http"]["method"]
     body_raw = event.get("body")
     body = json.loads(body_raw) if body_raw else {}
 
-    logger.info(f"HTTP Method: {method}")
-    logger.info(f"Request body: {body}")
+    logger.info("HTTP Method: %s", method)
+    logger.debug("Request body: %s", lazy_json(body))
 
     try:
         if method == "POST":
-            # --- Create / Send Message ---
+            # --- Create / Send Message(s) ---
+            items = batch_items(body, "messages")
+            if items is not None:
+                logger.info("Sending batch of %d message(s)", len(items))
+                return _resp(200, batch_call("send_message_batch", [send_entry(i) for i in items]))
             message = body.get("message", "no message")
-            logger.info(f"Sending message: {message}")
-            resp = sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=message)
-            logger.info(f"Message sent with ID: {resp['MessageId']}")
+            logger.debug("Sending message: %s", message)
+            resp = get_client("sqs").send_message(QueueUrl=QUEUE_URL, MessageBody=message)
+            logger.info("Message sent with ID: %s", resp["MessageId"])
             return _resp(200, {"messageId": resp["MessageId"]})
 
         elif method == "GET":
-            # --- Read / Receive Message ---
-            logger.info("Receiving message(s) from queue")
-            resp = sqs.receive_message(
-                QueueUrl=QUEUE_URL,
-                MaxNumberOfMessages=1,
-                VisibilityTimeout=20,
-                WaitTimeSeconds=0
-            )
-            messages = resp.get("Messages", [])
-            logger.info(f"Received {len(messages)} message(s)")
+            # --- Read / Receive Message(s) ---
+            qs = event.get("queryStringParameters") or {}
+            max_messages = int_param(qs, "max", 1, 1, MAX_RECEIVE)
+            wait_seconds = int_param(qs, "wait", 0, 0, MAX_WAIT_SECONDS)
+            logger.info("Receiving up to %d message(s), waiting up to %ds", max_messages, wait_seconds)
+            messages = receive_messages(max_messages, wait_seconds)
+            logger.info("Received %d message(s)", len(messages))
             return _resp(200, messages)
 
         elif method == "DELETE":
-            # --- Delete Message ---
+            # --- Delete Message(s) ---
+            items = batch_items(body, "receiptHandles")
+            if items is not None:
+                logger.info("Deleting batch of %d message(s)", len(items))
+                return _resp(200, batch_call("delete_message_batch", [{"ReceiptHandle": h} for h in items]))
             handle = body.get("receiptHandle")
             if not handle:
                 logger.warning("DELETE called without receiptHandle")
                 return _resp(400, {"error": "receiptHandle required"})
-            logger.info(f"Deleting message with handle: {handle[:20]}...")
-            sqs.delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=handle)
+            logger.info("Deleting message with handle: %s...", handle[:20])
+            get_client("sqs").delete_message(QueueUrl=QUEUE_URL, ReceiptHandle=handle)
             logger.info("Message deleted successfully")
             return _resp(200, {"deleted": True})
 
         elif method == "PUT":
-            # --- Update Visibility Timeout ---
+            # --- Update Visibility Timeout(s) ---
+            items = batch_items(body, "entries")
+            if items is not None:
+                logger.info("Changing visibility of %d message(s)", len(items))
+                return _resp(200, batch_call("change_message_visibility_batch", [visibility_entry(i) for i in items]))
             handle = body.get("receiptHandle")
             timeout = int(body.get("visibilityTimeout", 30))
             if not handle:
                 logger.warning("PUT called without receiptHandle")
                 return _resp(400, {"error": "receiptHandle required"})
-            logger.info(f"Updating visibility timeout to {timeout}s for handle: {handle[:20]}...")
-            sqs.change_message_visibility(
+            logger.info("Updating visibility timeout to %ds for handle: %s...", timeout, handle[:20])
+            get_client("sqs").change_message_visibility(
                 QueueUrl=QUEUE_URL,
                 ReceiptHandle=handle,
                 VisibilityTimeout=timeout
@@ -94,9 +237,13 @@ def lambda_handler(event, context):
             return _resp(200, {"updated": True})
 
         else:
-            logger.warning(f"Unsupported HTTP method: {method}")
+            logger.warning("Unsupported HTTP method: %s", method)
             return _resp(405, {"error": f"method {method} not allowed"})
 
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning("Bad request: %s", e)
+        return _resp(400, {"error": str(e)})
+
     except Exception as e:
         logger.exception("Error processing request")
         return _resp(500, {"error": str(e)})
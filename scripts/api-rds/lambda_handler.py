@@ -1,8 +1,13 @@
+import base64
+import hashlib
 import json
 import os
-import boto3
 import pg8000
-import logging
+import time
+from collections import OrderedDict
+from aws_clients import get_client
+from request_logging import get_logger, lazy_json, log_request
+from timing import instrument_db, span
 
 '''
 
@@ -13,12 +18,33 @@ curl -X POST "https://api.aws-serverless.net/api-rds" \
 
 # {"id": 55}  
 
-# LIST ALL
-curl -X GET "https://api.aws-serverless.net/api-rds"
+# BULK CREATE / UPDATE (items with an "id" are updated, the rest inserted)
+curl -X POST "https://api.aws-serverless.net/api-rds/_bulk" \
+  -H "Content-Type: application/json" \
+  -d '[{"name": "Ann", "email": "ann@example.com"}, {"id": 56, "name": "Bob", "email": "bob@example.com"}]'
+
+# {"created": 1, "updated": 1, "failed": 0,
+#  "results": [{"index": 0, "id": 57, "status": "created"}, {"index": 1, "id": 56, "status": "updated"}]}
+
+# LIST (first page, then follow next_cursor)
+curl -X GET "https://api.aws-serverless.net/api-rds?limit=50"
+curl -X GET "https://api.aws-serverless.net/api-rds?limit=50&cursor=eyJpZCI6IDUwfQ"
+
+# {"items": [...], "next_cursor": "eyJpZCI6IDEwMH0"}   (null on the last page)
+
+# SEARCH (indexed, case-insensitive; same paging as LIST)
+curl -X GET "https://api.aws-serverless.net/api-rds?email=jane@example.com"
+curl -X GET "https://api.aws-serverless.net/api-rds?name_prefix=jan&limit=20"
 
 # GET ONE
 curl -X GET "https://api.aws-serverless.net/api-rds/56"
 
+# Conditional GET: send back the ETag from a previous response, 304 if unchanged
+curl -i "https://api.aws-serverless.net/api-rds/56" -H 'If-None-Match: "56-1234"'
+
+# Read your own write: bypass the response cache and the read replica
+curl -X GET "https://api.aws-serverless.net/api-rds/56" -H "X-Consistent-Read: true"
+
 # UPDATE
 curl -X PUT "https://api.aws-serverless.net/api-rds/56" \
   -H "Content-Type: application/json" \
@@ -44,155 +70,717 @@ curl -X OPTIONS "https://api.aws-serverless.net/api-rds/47" \
 
 
 # ---------- Logging setup ----------
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
+
+
+# ---------- Container-scoped state ----------
+# Everything below lives for the life of the Lambda container, so warm
+# invocations skip the Secrets Manager call, the TCP/auth handshake and the
+# schema migration check.
+SECRET_TTL_SECONDS = int(os.environ.get("SECRET_TTL_SECONDS", "300"))
+HEALTHCHECK_IDLE_SECONDS = int(os.environ.get("HEALTHCHECK_IDLE_SECONDS", "30"))
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+FETCH_CHUNK_SIZE = 100
+MAX_BULK_ITEMS = 1000
+
+# Read-through cache for GET responses. Other containers may serve an entry
+# for up to CACHE_TTL_SECONDS after a write they did not see.
+CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "512"))
+
+# Optional read replica. When set, GETs use a second container-scoped
+# connection to it and writes stay on DB_HOST. Reads go to the writer
+# instead when the request sends "X-Consistent-Read: true", for
+# GET /api-rds/{id} of a contact this container wrote in the last
+# READ_AFTER_WRITE_SECONDS (replica lag is usually well under that), and
+# for READER_RETRY_SECONDS after the reader failed. Stickiness is per
+# contact, not per container: a container that writes steadily would
+# otherwise never read from the replica. Lists and searches only see their
+# own writes with the header.
+READER_HOST = os.environ.get("DB_READER_HOST", "")
+READ_AFTER_WRITE_SECONDS = float(os.environ.get("READ_AFTER_WRITE_SECONDS", "5"))
+READER_RETRY_SECONDS = 30
+# Bounds connect and every query on the reader, so a dead replica costs at
+# most this before the writer takes over
+READER_TIMEOUT_SECONDS = 5
+
+_secret_cache = {"creds": None, "fetched_at": 0.0}
+_conn = None
+_conn_last_used = 0.0
+_schema_ready = False
+_reader_conn = None
+_reader_last_used = 0.0
+_reader_down_until = 0.0
+# contact id -> monotonic time this container last wrote it
+_recent_writes = {}
+# Set once a write request starts committing; a connection lost after that
+# may or may not have committed, so the request is not retried
+_commit_started = False
 
 
 # ---------- Database helpers ----------
+def get_secret(force_refresh=False):
+    age = time.monotonic() - _secret_cache["fetched_at"]
+    if not force_refresh and _secret_cache["creds"] and age < SECRET_TTL_SECONDS:
+        return _secret_cache["creds"]
+
+    logger.info("Fetching DB secret (force_refresh=%s)", force_refresh)
+    secret = get_client("secretsmanager").get_secret_value(SecretId=os.environ['SECRET_ARN'])
+    _secret_cache["creds"] = json.loads(secret['SecretString'])
+    _secret_cache["fetched_at"] = time.monotonic()
+    return _secret_cache["creds"]
+
+def open_db_connection(creds, host=None, timeout=None):
+    host = host or os.environ['DB_HOST']
+    logger.info("Opening DB connection to %s", host)
+    with span("pg.connect"):
+        conn = pg8000.connect(
+            user=creds['username'],
+            password=creds['password'],
+            host=host,
+            database="maindb",
+            port=5432,
+            timeout=timeout
+        )
+    # Every query on it is timed (see timing.py)
+    return instrument_db(conn)
+
+def is_healthy(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+        return True
+    except Exception as e:
+        logger.warning("DB health check failed: %s", e)
+        return False
+
+def discard_db_connection():
+    global _conn
+    if _conn is not None:
+        try:
+            _conn.close()
+        except Exception:
+            pass
+        logger.info("DB connection discarded")
+        clear_prepared(_conn)
+    _conn = None
+
 def get_db_connection():
-    logger.info("Opening DB connection")
-    secret_arn = os.environ['SECRET_ARN']
-    db_host = os.environ['DB_HOST']
-    secret_client = boto3.client('secretsmanager')
-
-    secret = secret_client.get_secret_value(SecretId=secret_arn)
-    creds = json.loads(secret['SecretString'])
-
-    conn = pg8000.connect(
-        user=creds['username'],
-        password=creds['password'],
-        host=db_host,
-        database="maindb",
-        port=5432
-    )
-    return conn
-
-def create_table(conn):
-    logger.info("Ensuring demo_contacts table exists")
-    cursor = conn.cursor()
-    cursor.execute("""
+    global _conn, _conn_last_used, _schema_ready
+
+    # Only ping a connection that has been idle for a while; a busy container
+    # relies on reconnect-on-error instead of paying a round trip per request.
+    if _conn is not None:
+        idle = time.monotonic() - _conn_last_used
+        if idle < HEALTHCHECK_IDLE_SECONDS or is_healthy(_conn):
+            _conn_last_used = time.monotonic()
+            return _conn
+        discard_db_connection()
+
+    try:
+        conn = open_db_connection(get_secret())
+    except pg8000.DatabaseError as e:
+        # Most likely the password was rotated under a cached secret
+        logger.warning("DB connect failed (%s), refreshing secret and retrying", e)
+        conn = open_db_connection(get_secret(force_refresh=True))
+
+    # Once per container; a failure leaves the flag unset so the next request retries
+    if not _schema_ready:
+        try:
+            run_migrations(conn)
+        except Exception:
+            conn.close()
+            raise
+        _schema_ready = True
+
+    _conn = conn
+    _conn_last_used = time.monotonic()
+    return _conn
+
+def commit_write(conn):
+    global _commit_started
+    _commit_started = True
+    conn.commit()
+
+# ---------- Read routing ----------
+def discard_reader_connection():
+    global _reader_conn
+    if _reader_conn is not None:
+        try:
+            _reader_conn.close()
+        except Exception:
+            pass
+        logger.info("Reader connection discarded")
+        clear_prepared(_reader_conn)
+    _reader_conn = None
+
+def mark_reader_down(error):
+    global _reader_down_until
+    logger.warning("Reader unavailable (%s), reading from the writer for %ds", error, READER_RETRY_SECONDS)
+    discard_reader_connection()
+    _reader_down_until = time.monotonic() + READER_RETRY_SECONDS
+
+def get_reader_connection():
+    """The replica connection, or the writer when there is none or it is down."""
+    global _reader_conn, _reader_last_used
+    if not READER_HOST or time.monotonic() < _reader_down_until:
+        return get_db_connection()
+    if not _schema_ready:
+        # Migrations run through the writer once per container, including
+        # containers that only ever serve GETs
+        get_db_connection()
+
+    if _reader_conn is not None:
+        idle = time.monotonic() - _reader_last_used
+        if idle < HEALTHCHECK_IDLE_SECONDS or is_healthy(_reader_conn):
+            _reader_last_used = time.monotonic()
+            return _reader_conn
+        discard_reader_connection()
+
+    try:
+        # The replica shares the writer's credentials
+        _reader_conn = open_db_connection(get_secret(), READER_HOST, READER_TIMEOUT_SECONDS)
+    except Exception as e:
+        mark_reader_down(e)
+        return get_db_connection()
+    _reader_last_used = time.monotonic()
+    return _reader_conn
+
+def note_write(contact_ids):
+    now = time.monotonic()
+    for cid in [c for c, at in _recent_writes.items() if now - at >= READ_AFTER_WRITE_SECONDS]:
+        del _recent_writes[cid]
+    for cid in contact_ids:
+        _recent_writes[cid] = now
+
+def wrote_recently(contact_id):
+    at = _recent_writes.get(contact_id)
+    return at is not None and time.monotonic() - at < READ_AFTER_WRITE_SECONDS
+
+def read_connection(consistent=False):
+    if consistent:
+        return get_db_connection()
+    return get_reader_connection()
+
+def run_read(consistent, fn, *args):
+    """fn(conn, *args) on the reader, retried once on the writer if the reader fails."""
+    conn = read_connection(consistent)
+    if conn is not _conn:
+        try:
+            return fn(conn, *args)
+        except (pg8000.Error, OSError) as e:
+            mark_reader_down(e)
+            conn = get_db_connection()
+    try:
+        return fn(conn, *args)
+    except pg8000.DatabaseError:
+        # The handler only rolls back the connection it opened for writes
+        conn.rollback()
+        raise
+
+# ---------- Schema migrations ----------
+# Applied in order, once, and recorded in schema_migrations. Never edit a
+# released entry; append a new version instead. Postgres DDL is
+# transactional, so a failed run leaves nothing half-applied.
+MIGRATIONS = [
+    (1, "create demo_contacts", """
         CREATE TABLE IF NOT EXISTS demo_contacts (
             id SERIAL PRIMARY KEY,
             name TEXT NOT NULL,
             email TEXT NOT NULL,
             phone TEXT,
             created_at TIMESTAMP DEFAULT now()
-        );
-    """)
-    conn.commit()
-    cursor.close()
+        )
+    """),
+    # Case-insensitive ?email= lookups; id makes the keyset page an index range
+    (2, "index demo_contacts by email",
+     "CREATE INDEX IF NOT EXISTS demo_contacts_email_idx ON demo_contacts (lower(email), id)"),
+    # ?name_prefix= as a range scan; "C" collation orders by code point, so a
+    # prefix is one contiguous range whatever the database collation
+    (3, "index demo_contacts by name prefix",
+     'CREATE INDEX IF NOT EXISTS demo_contacts_name_idx ON demo_contacts ((lower(name) COLLATE "C"), id)'),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+# Serialises containers that cold-start together against an old schema
+MIGRATION_LOCK_ID = 0x7435_7264
+
+def schema_version(cursor):
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute("SELECT coalesce(max(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+def run_migrations(conn):
+    cursor = conn.cursor()
+    try:
+        # Usual case: one read-only round trip and no DDL at all
+        if schema_version(cursor) >= SCHEMA_VERSION:
+            conn.commit()
+            return
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT now()
+            )
+        """)
+        # Re-read under the lock: another container may have just finished
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+        for version, name, sql in MIGRATIONS:
+            if version in applied:
+                continue
+            logger.info("Applying migration %d: %s", version, name)
+            cursor.execute(sql)
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# ---------- Response cache ----------
+# LRU keyed by ("contact", id), ("list", after_id, limit) or, for filtered
+# pages, ("list", field, value, after, limit). Values are (etag, body, expires_at).
+_cache = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+def cache_get(key):
+    entry = _cache.get(key)
+    if entry is None or entry[2] < time.monotonic():
+        if entry is not None:
+            del _cache[key]
+        _cache_stats["misses"] += 1
+        return None
+    _cache.move_to_end(key)
+    _cache_stats["hits"] += 1
+    return entry
+
+def cache_put(key, etag, body):
+    _cache[key] = (etag, body, time.monotonic() + CACHE_TTL_SECONDS)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+        _cache_stats["evictions"] += 1
+
+def cache_invalidate(contact_ids=()):
+    # Any list page may contain a written row, so writes drop every page
+    for key in [k for k in _cache if k[0] == "list" or (k[0] == "contact" and k[1] in contact_ids)]:
+        del _cache[key]
+        _cache_stats["invalidations"] += 1
+
+def contact_etag(contact):
+    return f'"{contact["id"]}-{contact["version"]}"'
+
+def page_etag(page):
+    digest = hashlib.md5(
+        ",".join(f'{c["id"]}:{c["version"]}' for c in page["items"]).encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+# ---------- Prepared statements ----------
+# Parsed once per connection (writer and reader each have their own) and
+# then executed by handle. Uses pg8000's
+# named (:param) style. The unfiltered list query is left out: it runs as a DECLARE'd
+# server-side cursor per page (see get_all_contacts).
+STATEMENTS = {
+    "get_by_id": "SELECT id, name, email, phone, created_at, xmin::text FROM demo_contacts WHERE id = :id",
+    "insert": "INSERT INTO demo_contacts (name, email, phone) VALUES (:name, :email, :phone) RETURNING id",
+    "update": "UPDATE demo_contacts SET name = :name, email = :email, phone = :phone WHERE id = :id",
+    "delete": "DELETE FROM demo_contacts WHERE id = :id",
+    # Filtered pages (see search_contacts); each is a range scan on a migration index
+    "find_by_email": """
+        SELECT id, name, email, phone, created_at, xmin::text FROM demo_contacts
+        WHERE lower(email) = lower(:email) AND id > :after_id
+        ORDER BY id
+        LIMIT :limit
+    """,
+    "find_by_name_prefix": """
+        SELECT id, name, email, phone, created_at, xmin::text, lower(name) FROM demo_contacts
+        WHERE (lower(name) COLLATE "C", id) > (:after_name, :after_id) AND lower(name) COLLATE "C" < :high
+        ORDER BY lower(name) COLLATE "C", id
+        LIMIT :limit
+    """,
+}
+
+# connection -> {name: (statement, prepare_ms)}
+_prepared = {}
+_prepared_stats = {"prepares": 0, "executions": 0, "prepare_ms": 0.0, "saved_ms": 0.0}
+
+def clear_prepared(conn=None):
+    # Statement handles die with their connection
+    if conn is None:
+        _prepared.clear()
+    else:
+        _prepared.pop(conn, None)
+
+def run_prepared(conn, name, /, **params):
+    statements = _prepared.setdefault(conn, {})
+    entry = statements.get(name)
+    if entry is None:
+        t0 = time.perf_counter()
+        stmt = conn.prepare(STATEMENTS[name])
+        cost_ms = (time.perf_counter() - t0) * 1000
+        statements[name] = entry = (stmt, cost_ms)
+        _prepared_stats["prepares"] += 1
+        _prepared_stats["prepare_ms"] += cost_ms
+    else:
+        # Approximate saving: the parse/describe round trip measured at prepare time
+        _prepared_stats["saved_ms"] += entry[1]
+
+    _prepared_stats["executions"] += 1
+    return entry[0].run(**params)
+
 
 # ---------- CRUD operations ----------
-def get_all_contacts(conn):
-    logger.info("Fetching all contacts")
+def encode_cursor(last_id, name=None):
+    fields = {"id": last_id} if name is None else {"id": last_id, "name": name}
+    raw = json.dumps(fields).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token):
+    if not token:
+        return 0
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def decode_name_cursor(token):
+    """(lower(name), id) of the last row on the previous ?name_prefix= page."""
+    if not token:
+        return "", 0
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(fields["name"], str):
+            raise TypeError("name")
+        return fields["name"], int(fields["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def parse_search(query_params):
+    """(field, value, after) for ?email= / ?name_prefix=, or None for a plain list."""
+    fields = [f for f in ("email", "name_prefix") if query_params.get(f)]
+    if not fields:
+        return None
+    if len(fields) > 1:
+        raise ValueError("Filter by email or name_prefix, not both")
+    field = fields[0]
+    cursor = query_params.get("cursor")
+    after = decode_cursor(cursor) if field == "email" else decode_name_cursor(cursor)
+    return field, query_params[field], after
+
+def prefix_range(prefix):
+    # [low, high) in code point order: "ab" -> ["ab", "ac")
+    low = prefix.lower()
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+def contact_from_row(row):
+    return {"id": row[0], "name": row[1], "email": row[2], "phone": row[3], "created_at": str(row[4]),
+            "version": row[5]}
+
+def parse_limit(raw):
+    if raw is None:
+        return DEFAULT_PAGE_LIMIT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("Invalid limit")
+    return max(1, min(limit, MAX_PAGE_LIMIT))
+
+def get_all_contacts(conn, limit=DEFAULT_PAGE_LIMIT, after_id=0):
+    logger.info("Fetching contacts page: after_id=%s limit=%s", after_id, limit)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, name, email, phone, created_at FROM demo_contacts")
-    rows = cursor.fetchall()
+    # Keyset pagination on the primary key: each page is an index range scan,
+    # so cost stays flat however deep the client pages. Rows are pulled through
+    # a server-side cursor in fixed chunks instead of one big fetchall().
+    # One extra row is requested to know whether another page exists.
+    cursor.execute("""
+        DECLARE contacts_page NO SCROLL CURSOR FOR
+        SELECT id, name, email, phone, created_at, xmin::text FROM demo_contacts
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    """, (after_id, limit + 1))
+
+    items = []
+    while True:
+        cursor.execute(f"FETCH FORWARD {FETCH_CHUNK_SIZE} FROM contacts_page")
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        items.extend(contact_from_row(r) for r in rows)
+    cursor.execute("CLOSE contacts_page")
+    conn.commit()
     cursor.close()
-    return [
-        {"id": r[0], "name": r[1], "email": r[2], "phone": r[3], "created_at": str(r[4])}
-        for r in rows
-    ]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+def search_contacts(conn, field, value, after, limit=DEFAULT_PAGE_LIMIT):
+    """
+    One page of contacts matching ?email= (case-insensitive, ordered by id) or
+    ?name_prefix= (case-insensitive, ordered by name then id). Both are keyset
+    pages on the indexes from migrations 2 and 3, so cost depends on the page
+    size, not the table size.
+    """
+    logger.info("Searching contacts: %s after=%s limit=%s", field, after, limit)
+    if field == "email":
+        rows = run_prepared(conn, "find_by_email", email=value, after_id=after, limit=limit + 1)
+    else:
+        low, high = prefix_range(value)
+        # The row comparison is the only lower bound so the index scan starts
+        # right at it; a separate ">= low" would let it start from the cursor
+        # and walk every name below the prefix. ids start at 1, so (low, 0)
+        # is the first page.
+        after_name, after_id = max((low, 0), after)
+        rows = run_prepared(conn, "find_by_name_prefix", high=high,
+                            after_name=after_name, after_id=after_id, limit=limit + 1)
+    conn.commit()
+
+    items = [contact_from_row(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[0]) if field == "email" else encode_cursor(last[0], last[6])
+    return {"items": items, "next_cursor": next_cursor}
 
 def get_contact_by_id(conn, id_value):
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, email, phone, created_at FROM demo_contacts WHERE id = %s", (id_value,))
-    row = cur.fetchone()
-    cur.close()
-    if not row:
+    rows = run_prepared(conn, "get_by_id", id=id_value)
+    conn.commit()
+    if not rows:
         return None
+    row = rows[0]
     return {
         "id": row[0],
         "name": row[1],
         "email": row[2],
         "phone": row[3],
         "created_at": str(row[4]),
+        # xmin changes on every write to the row, so it doubles as a row version
+        "version": row[5],
     }
 
 def create_contact(conn, body):
-    logger.info("Inserting new contact: %s", body)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO demo_contacts (name, email, phone) VALUES (%s, %s, %s) RETURNING id",
-        (body.get("name"), body.get("email"), body.get("phone"))
-    )
-    new_id = cursor.fetchone()[0]
-    conn.commit()
-    cursor.close()
+    logger.debug("Inserting new contact: %s", lazy_json(body))
+    rows = run_prepared(conn, "insert",
+                        name=body.get("name"), email=body.get("email"), phone=body.get("phone"))
+    new_id = rows[0][0]
+    commit_write(conn)
+    note_write((new_id,))
+    cache_invalidate()
     logger.info("Contact created with id=%s", new_id)
     return {"id": new_id}
 
 def update_contact(conn, contact_id, body):
     contact_id = int(contact_id)
-    logger.info("Updating contact id=%s with %s", contact_id, body)
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE demo_contacts
-        SET name=%s, email=%s, phone=%s
-        WHERE id=%s
-    """, (body.get("name"), body.get("email"), body.get("phone"), contact_id))
-    conn.commit()
-    cur.close()
+    logger.debug("Updating contact id=%s with %s", contact_id, lazy_json(body))
+    run_prepared(conn, "update", id=contact_id,
+                 name=body.get("name"), email=body.get("email"), phone=body.get("phone"))
+    commit_write(conn)
+    note_write((contact_id,))
+    cache_invalidate((contact_id,))
     return {"updated": True}
 
 def delete_contact(conn, contact_id):
     contact_id = int(contact_id)
     logger.info("Deleting contact id=%s", contact_id)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM demo_contacts WHERE id=%s", (contact_id,))
-    conn.commit()
-    cur.close()
+    run_prepared(conn, "delete", id=contact_id)
+    commit_write(conn)
+    note_write((contact_id,))
+    cache_invalidate((contact_id,))
     logger.info("Contact id=%s deleted", contact_id)
     return {"deleted": True}
 
+def bulk_upsert_contacts(conn, items):
+    logger.info("Bulk write of %s contacts", len(items))
+    results = [None] * len(items)
+    inserts, updates = [], []
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("name") or not item.get("email"):
+            results[idx] = {"index": idx, "error": "name and email are required"}
+        elif not isinstance(item["name"], str) or not isinstance(item["email"], str) \
+                or not isinstance(item.get("phone"), (str, type(None))):
+            # A number or object would fail the whole multi-row statement
+            results[idx] = {"index": idx, "error": "name, email and phone must be strings"}
+        elif item.get("id") is not None:
+            try:
+                updates.append((idx, int(item["id"]), item))
+            except (TypeError, ValueError):
+                results[idx] = {"index": idx, "error": "Invalid id"}
+        else:
+            inserts.append((idx, item))
+
+    cur = conn.cursor()
+    # One multi-row statement per kind, one commit for the whole batch
+    if inserts:
+        values = ", ".join(["(%s, %s, %s)"] * len(inserts))
+        params = [v for _, it in inserts for v in (it["name"], it["email"], it.get("phone"))]
+        cur.execute(
+            f"INSERT INTO demo_contacts (name, email, phone) VALUES {values} RETURNING id",
+            params
+        )
+        # Postgres returns rows of a multi-row VALUES insert in input order
+        for (idx, _), row in zip(inserts, cur.fetchall()):
+            results[idx] = {"index": idx, "id": row[0], "status": "created"}
+
+    if updates:
+        values = ", ".join(["(%s::int, %s, %s, %s)"] * len(updates))
+        params = [v for _, cid, it in updates for v in (cid, it["name"], it["email"], it.get("phone"))]
+        cur.execute(f"""
+            UPDATE demo_contacts AS c
+            SET name = v.name, email = v.email, phone = v.phone
+            FROM (VALUES {values}) AS v(id, name, email, phone)
+            WHERE c.id = v.id
+            RETURNING c.id
+        """, params)
+        found = {row[0] for row in cur.fetchall()}
+        for idx, cid, _ in updates:
+            if cid in found:
+                results[idx] = {"index": idx, "id": cid, "status": "updated"}
+            else:
+                results[idx] = {"index": idx, "id": cid, "error": "Not found"}
+
+    commit_write(conn)
+    cur.close()
+    note_write([r["id"] for r in results if "status" in r])
+    cache_invalidate(tuple(cid for _, cid, _ in updates))
+
+    return {
+        "created": sum(1 for r in results if r.get("status") == "created"),
+        "updated": sum(1 for r in results if r.get("status") == "updated"),
+        "failed": sum(1 for r in results if "error" in r),
+        "results": results,
+    }
+
+@log_request
 def lambda_handler(event, context):
-    logger.info("Event received: %s", json.dumps(event))
+    global _commit_started
     method = event.get("requestContext", {}).get("http", {}).get("method", "")
     path_params = event.get("pathParameters") or {}
+    query_params = event.get("queryStringParameters") or {}
     id_value = path_params.get("id")
     body = json.loads(event.get("body", "{}") or "{}")
 
-    conn = None
-    try:
-        conn = get_db_connection()
-        create_table(conn)
+    headers = event.get("headers") or {}
+    # Read-your-writes across containers: skip the cache and the replica
+    consistent = headers.get("x-consistent-read", "").lower() in ("1", "true")
+
+    for attempt in range(2):
+        conn = None
+        _commit_started = False
+        try:
+            # Cache hits on GET never touch the database; misses go through run_read
+            if method != "GET":
+                conn = get_db_connection()
+
+            if method == "GET":
+                if id_value:
+                    key = ("contact", int(id_value))
+                    cached = None if consistent else cache_get(key)
+                    if cached is None:
+                        result = run_read(consistent or wrote_recently(int(id_value)),
+                                          get_contact_by_id, int(id_value))
+                        if not result:
+                            return response(200, {"error": "Not found"})
+                        cached = (contact_etag(result), result)
+                        cache_put(key, *cached)
+                else:
+                    try:
+                        limit = parse_limit(query_params.get("limit"))
+                        search = parse_search(query_params)
+                        if search is None:
+                            after_id = decode_cursor(query_params.get("cursor"))
+                            key = ("list", after_id, limit)
+                        else:
+                            field, value, after = search
+                            key = ("list", field, value.lower(), after, limit)
+                    except ValueError as e:
+                        return response(400, {"error": str(e)})
+                    cached = None if consistent else cache_get(key)
+                    if cached is None:
+                        if search is None:
+                            page = run_read(consistent, get_all_contacts, limit, after_id)
+                        else:
+                            page = run_read(consistent, search_contacts, field, value, after, limit)
+                        cached = (page_etag(page), page)
+                        cache_put(key, *cached)
+
+                etag, result = cached[0], cached[1]
+                if_none_match = headers.get("if-none-match", "")
+                if etag in [t.strip() for t in if_none_match.split(",")]:
+                    return {"statusCode": 304, "headers": {"ETag": etag}}
+                return response(200, result, {"ETag": etag})
+
+            elif method == "POST":
+                if event.get("rawPath", "").endswith("/_bulk") or isinstance(body, list):
+                    items = body if isinstance(body, list) else body.get("items", [])
+                    if not isinstance(items, list) or not items:
+                        return response(400, {"error": "Expected a non-empty array of contacts"})
+                    if len(items) > MAX_BULK_ITEMS:
+                        return response(400, {"error": f"At most {MAX_BULK_ITEMS} contacts per request"})
+                    return response(200, bulk_upsert_contacts(conn, items))
+                return response(200, create_contact(conn, body))
+
+            elif method == "PUT":
+                if not id_value:
+                    return response(400, {"error": "Missing ID"})
+                return response(200, update_contact(conn, int(id_value), body))
+
+            elif method == "DELETE":
+                if not id_value:
+                    return response(400, {"error": "Missing ID"})
+                return response(200, delete_contact(conn, int(id_value)))
 
-        if method == "GET":
-            if id_value:
-                result = get_contact_by_id(conn, int(id_value))
-                return response(200, result or {"error": "Not found"})
             else:
-                return response(200, get_all_contacts(conn))
-
-        elif method == "POST":
-            return response(200, create_contact(conn, body))
-
-        elif method == "PUT":
-            if not id_value:
-                return response(400, {"error": "Missing ID"})
-            return response(200, update_contact(conn, int(id_value), body))
-
-        elif method == "DELETE":
-            if not id_value:
-                return response(400, {"error": "Missing ID"})
-            return response(200, delete_contact(conn, int(id_value)))
-
-        else:
-            return response(400, {"error": f"Unsupported method: {method}"})
-
-    except Exception as e:
-        logger.exception("Error during request processing: %s", str(e))
-        return response(500, {"error": str(e)})
-
-    finally:
-        if conn:
-            conn.close()
-            logger.info("DB connection closed")
-
-
-def response(status, body):
+                return response(400, {"error": f"Unsupported method: {method}"})
+
+        except pg8000.InterfaceError as e:
+            # Socket-level failure, usually a connection the server closed (restart,
+            # failover) while it sat inside the health-check window
+            discard_db_connection()
+            # Nothing was committed unless a commit was under way, so one retry on a
+            # fresh connection is safe; after that the outcome of a write is unknown
+            if attempt == 0 and not _commit_started:
+                logger.warning("DB connection lost (%s), retrying on a new connection", e)
+                continue
+            logger.exception("DB connection lost: %s", str(e))
+            return response(500, {"error": str(e)})
+
+        except Exception as e:
+            logger.exception("Error during request processing: %s", str(e))
+            if conn:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard_db_connection()
+            return response(500, {"error": str(e)})
+
+        finally:
+            logger.info("Prepared statement stats: prepares=%d executions=%d prepare_ms=%.2f saved_ms=%.2f",
+                        _prepared_stats["prepares"], _prepared_stats["executions"],
+                        _prepared_stats["prepare_ms"], _prepared_stats["saved_ms"])
+            logger.info("Cache stats: size=%d hits=%d misses=%d evictions=%d invalidations=%d",
+                        len(_cache), _cache_stats["hits"], _cache_stats["misses"],
+                        _cache_stats["evictions"], _cache_stats["invalidations"])
+
+
+def response(status, body, headers=None):
     return {
         "statusCode": status,
-        "headers": {"Content-Type": "application/json"},
+        "headers": {"Content-Type": "application/json", **(headers or {})},
         "body": json.dumps(body)
     }
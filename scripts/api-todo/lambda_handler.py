@@ -1,16 +1,21 @@
+import base64
 import json
-import boto3
 import os
-import logging
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
+from aws_clients import get_client, get_resource
+from request_logging import get_logger, lazy_json, log_request
 
 '''
 curl -X POST https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo \
   -H "Content-Type: application/json" \
   -d '{"task": "buy milk", "ttl_seconds": 600}'
 
-{"item":{"id":"20251026213045","task":"buy milk","created_at":"2025-10-26T21:30:45Z","ttl":1735309845,"done":false}}
+{"item":{"id":"20251026213045123456a1b2c3","task":"buy milk","created_at":"2025-10-26T21:30:45.123456Z","ttl":1735309845,"done":false,"status":"open"}}
 ✅ Expected →
 Returns a 201 with an item object:
 '''
@@ -18,8 +23,16 @@ Returns a 201 with an item object:
 '''
 curl https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo
 
-✅ Returns a list of all tasks.
+✅ Returns a list of all tasks (parallel segmented scan, every page followed).
 curl "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?id=20251027221251"
+
+curl "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?done=false&since=2025-10-26T00:00:00Z"
+✅ Open tasks created since the given time, newest first, via a Query on the status index
+   (paged the same way as below: {"items": [...], "next_token": "..."})
+
+curl "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?limit=20"
+✅ Returns {"items": [...], "next_token": "..."} - pass next_token back for the next page (null when done)
+curl "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?limit=20&next_token=eyJpZCI6ICIyMDI1MTAyNjIxMzA0NSJ9"
 '''
 
 '''
@@ -35,30 +48,247 @@ curl -X DELETE "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?
 ✅ Returns {"message":"Deleted"}
 '''
 
+'''
+Batch routes - one request, many items (BatchWriteItem x25 / BatchGetItem x100 under the hood)
+
+curl -X POST https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo \
+  -H "Content-Type: application/json" \
+  -d '[{"task": "buy milk"}, {"task": "buy eggs", "ttl_seconds": 600}]'
+✅ Returns 201 {"results": [{"id": "...", "status": "ok"}, ...], "failed": 0}
+
+curl "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo?ids=20251026213045123456a1b2c3,20251026213045123789d4e5f6"
+✅ Returns {"items": [...], "missing": [...], "unprocessed": [...]}
+
+curl -X DELETE https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-todo \
+  -H "Content-Type: application/json" \
+  -d '{"ids": ["20251026213045123456a1b2c3", "20251026213045123789d4e5f6"]}'
+✅ Returns {"results": [{"id": "...", "status": "ok"}, ...], "failed": 0}
+'''
+
 # --- Logging setup ---
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
 # TABLE_NAME = os.environ.get("TODO_TABLE", "t5-test-todo")
 TABLE_NAME = "t5-test-todo"
-logger.info(f"Using DynamoDB table: {TABLE_NAME}")
+logger.info("Using DynamoDB table: %s", TABLE_NAME)
+
+_table = None
+
+def get_table():
+    global _table
+    if _table is None:
+        _table = get_resource("dynamodb").Table(TABLE_NAME)
+    return _table
+
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))
+MAX_PAGE_LIMIT = 100
+STATUS_INDEX = "status-created_at-index"
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+MAX_BATCH_ITEMS = 1000
+MAX_BATCH_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 0.05
+BACKOFF_CAP_SECONDS = 1.0
+
+# Attributes returned by the listing routes; ttl is a reserved word, hence the names map
+LIST_PROJECTION = "#id, #task, #created_at, #ttl, #done, #status"
+LIST_ATTRIBUTE_NAMES = {f"#{a}": a for a in ("id", "task", "created_at", "ttl", "done", "status")}
+
+
+class DecimalEncoder(json.JSONEncoder):
+    # default() is only called for values json can't handle itself, so items
+    # are encoded in one pass with no intermediate copy
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        if isinstance(o, set):
+            return list(o)
+        return super().default(o)
+
+
+def to_json(obj):
+    return json.dumps(obj, cls=DecimalEncoder, separators=(",", ":"))
+
+
+def from_attribute_value(av):
+    # Low-level AttributeValue -> plain Python, numbers straight to int/float.
+    # Only for get_client() responses; resources deserialize Items themselves.
+    kind, value = next(iter(av.items()))
+    if kind == "S" or kind == "BOOL":
+        return value
+    if kind == "N":
+        return int(value) if value.lstrip("-").isdigit() else float(value)
+    if kind == "M":
+        return {k: from_attribute_value(v) for k, v in value.items()}
+    if kind == "L":
+        return [from_attribute_value(v) for v in value]
+    if kind == "NULL":
+        return None
+    if kind == "NS":
+        return [int(n) if n.lstrip("-").isdigit() else float(n) for n in value]
+    return value
+
+def new_item_id(now):
+    # Microsecond timestamp keeps ids time-sortable; the random suffix makes
+    # concurrent POSTs in the same microsecond (or across containers) distinct
+    return now.strftime("%Y%m%d%H%M%S%f") + secrets.token_hex(3)
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(TABLE_NAME)
+def status_of(done):
+    return "done" if done else "open"
 
-def decimal_to_float(obj):
-    if isinstance(obj, list):
-        return [decimal_to_float(i) for i in obj]
-    if isinstance(obj, dict):
-        return {k: decimal_to_float(v) for k, v in obj.items()}
-    if isinstance(obj, Decimal):
-        return float(obj)
-    return obj
+def build_item(body):
+    now = datetime.utcnow()
+    ttl_seconds = body.get("ttl_seconds", 3600)
+    ttl_epoch = int((now + timedelta(seconds=ttl_seconds)).timestamp())
+    return {
+        "id": body.get("id") or new_item_id(now),
+        "task": body.get("task", "no description"),
+        "created_at": now.isoformat(timespec="microseconds") + "Z",
+        "ttl": ttl_epoch,
+        "done": False,
+        # String mirror of done: GSI keys can't be booleans
+        "status": status_of(False),
+    }
 
+def backoff(attempt):
+    # Full jitter: spread retries so throttled callers don't retry in lockstep
+    time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+def chunked(seq, size):
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+def batch_write(requests):
+    """requests: list of (id, WriteRequest). Returns the ids left unprocessed."""
+    failed = []
+    for chunk in chunked(requests, BATCH_WRITE_SIZE):
+        pending = [req for _, req in chunk]
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            res = get_resource("dynamodb").batch_write_item(RequestItems={TABLE_NAME: pending})
+            pending = res.get("UnprocessedItems", {}).get(TABLE_NAME, [])
+            if not pending:
+                break
+            logger.info("%d unprocessed write(s), retry %d", len(pending), attempt + 1)
+            backoff(attempt)
+        for req in pending:
+            key = req.get("PutRequest", {}).get("Item") or req["DeleteRequest"]["Key"]
+            failed.append(key["id"])
+    return failed
+
+def batch_results(ids, failed, errors):
+    """errors maps a request position to its message, so repeated ids are told apart."""
+    failed = set(failed)
+    results = []
+    for index, item_id in enumerate(ids):
+        if index in errors:
+            results.append({"id": item_id, "status": "error", "error": errors[index]})
+        elif item_id in failed:
+            results.append({"id": item_id, "status": "error", "error": "Unprocessed after retries"})
+        else:
+            results.append({"id": item_id, "status": "ok"})
+    return {"results": results, "failed": sum(1 for r in results if r["status"] == "error")}
+
+def batch_put(bodies):
+    items = [build_item(b) for b in bodies]
+    ids, requests, errors, seen = [], [], {}, set()
+    for index, item in enumerate(items):
+        ids.append(item["id"])
+        # BatchWriteItem rejects a whole chunk that repeats a key; the first copy is written
+        if item["id"] in seen:
+            errors[index] = "Duplicate id in batch"
+            continue
+        seen.add(item["id"])
+        requests.append((item["id"], {"PutRequest": {"Item": item}}))
+    return batch_results(ids, batch_write(requests), errors)
+
+def batch_delete(ids):
+    unique = list(dict.fromkeys(ids))
+    requests = [(i, {"DeleteRequest": {"Key": {"id": i}}}) for i in unique]
+    return batch_results(unique, batch_write(requests), {})
+
+def batch_get(ids):
+    unique = list(dict.fromkeys(ids))
+    found, unprocessed = [], []
+    for chunk in chunked(unique, BATCH_GET_SIZE):
+        request = {TABLE_NAME: {"Keys": [{"id": i} for i in chunk]}}
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            res = get_resource("dynamodb").batch_get_item(RequestItems=request)
+            found.extend(res.get("Responses", {}).get(TABLE_NAME, []))
+            request = res.get("UnprocessedKeys") or {}
+            if not request:
+                break
+            logger.info("Unprocessed keys, retry %d", attempt + 1)
+            backoff(attempt)
+        unprocessed.extend(k["id"] for k in request.get(TABLE_NAME, {}).get("Keys", []))
+    found_ids = {item["id"] for item in found}
+    missing = [i for i in unique if i not in found_ids and i not in unprocessed]
+    return {"items": found, "missing": missing, "unprocessed": unprocessed}
+
+def encode_token(key):
+    raw = to_json(key).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_token(token):
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded), parse_float=Decimal, parse_int=Decimal)
+    except Exception:
+        raise ValueError("Invalid next_token")
+
+def scan_page(limit, next_token=None):
+    kwargs = {"Limit": limit, "ProjectionExpression": LIST_PROJECTION,
+              "ExpressionAttributeNames": LIST_ATTRIBUTE_NAMES}
+    if next_token:
+        kwargs["ExclusiveStartKey"] = decode_token(next_token)
+    res = get_table().scan(**kwargs)
+    last_key = res.get("LastEvaluatedKey")
+    return {"items": res.get("Items", []), "next_token": encode_token(last_key) if last_key else None}
+
+def query_by_status(done, since=None, limit=MAX_PAGE_LIMIT, next_token=None):
+    # Reads only the matching index range, newest first
+    from boto3.dynamodb.conditions import Key
+    condition = Key("status").eq(status_of(done))
+    if since:
+        condition = condition & Key("created_at").gte(since)
+    kwargs = {"IndexName": STATUS_INDEX, "KeyConditionExpression": condition,
+              "ScanIndexForward": False, "Limit": limit}
+    if next_token:
+        kwargs["ExclusiveStartKey"] = decode_token(next_token)
+    res = get_table().query(**kwargs)
+    last_key = res.get("LastEvaluatedKey")
+    return {"items": res.get("Items", []), "next_token": encode_token(last_key) if last_key else None}
+
+def parse_bool(raw):
+    if raw.lower() in ("true", "1", "yes"):
+        return True
+    if raw.lower() in ("false", "0", "no"):
+        return False
+    raise ValueError(f"Invalid boolean: {raw}")
+
+def scan_segment(segment, total_segments):
+    # The low-level client is thread-safe, the resource layer is not. It has to be
+    # a plain client: a resource's meta.client hands back Items already deserialized.
+    client = get_client("dynamodb")
+    kwargs = {"TableName": TABLE_NAME, "Segment": segment, "TotalSegments": total_segments,
+              "ProjectionExpression": LIST_PROJECTION, "ExpressionAttributeNames": LIST_ATTRIBUTE_NAMES}
+    items = []
+    while True:
+        res = client.scan(**kwargs)
+        items.extend({k: from_attribute_value(v) for k, v in i.items()} for i in res.get("Items", []))
+        if "LastEvaluatedKey" not in res:
+            return items
+        kwargs["ExclusiveStartKey"] = res["LastEvaluatedKey"]
+
+def scan_all(total_segments=SCAN_SEGMENTS):
+    if total_segments <= 1:
+        return scan_segment(0, 1)
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        parts = pool.map(scan_segment, range(total_segments), [total_segments] * total_segments)
+        return [item for part in parts for item in part]
+
+@log_request
 def lambda_handler(event, context):
-    logger.info(f"Incoming event: {json.dumps(event)}")
     method = event.get("requestContext", {}).get("http", {}).get("method", "")
-    logger.info(f"HTTP method detected: {method}")
+    logger.info("HTTP method detected: %s", method)
 
     response = {"statusCode": 400, "headers": {"Content-Type": "application/json"}}
 
@@ -72,96 +302,118 @@ def lambda_handler(event, context):
         match method:
             # --- CREATE ---
             case "POST":
-                logger.info("Handling POST request")
                 body = json.loads(event.get("body") or "{}")
-                logger.info(f"Parsed body: {body}")
-
-                item_id = body.get("id") or datetime.utcnow().strftime("%Y%m%d%H%M%S")
-                ttl_seconds = body.get("ttl_seconds", 3600)
-                ttl_epoch = int((datetime.utcnow() + timedelta(seconds=ttl_seconds)).timestamp())
-
-                item = {
-                    "id": item_id,
-                    "task": body.get("task", "no description"),
-                    "created_at": datetime.utcnow().isoformat() + "Z",
-                    "ttl": ttl_epoch,
-                    "done": False,
-                }
-                logger.info(f"Putting item into DynamoDB: {item}")
-                table.put_item(Item=item)
-                response.update({"statusCode": 201, "body": json.dumps({"item": item})})
+                logger.debug("Parsed body: %s", lazy_json(body))
+
+                if isinstance(body, list):
+                    if not body or len(body) > MAX_BATCH_ITEMS:
+                        raise ValueError(f"Batch must contain 1 to {MAX_BATCH_ITEMS} items")
+                    logger.info("Batch put of %d items", len(body))
+                    result = batch_put(body)
+                    response.update({"statusCode": 201, "body": json.dumps(result)})
+                else:
+                    item = build_item(body)
+                    logger.info("Putting item id=%s", item["id"])
+                    get_table().put_item(Item=item)
+                    response.update({"statusCode": 201, "body": json.dumps({"item": item})})
 
             # --- READ ---
             case "GET":
-                logger.info("Handling GET request")
                 params = event.get("queryStringParameters") or {}
-                logger.info(f"Query parameters: {params}")
+                logger.debug("Query parameters: %s", lazy_json(params))
                 item_id = params.get("id") if params else None
 
                 if item_id:
-                    logger.info(f"Fetching item by id: {item_id}")
-                    res = table.get_item(Key={"id": item_id})
-                    logger.info(f"DynamoDB get_item response: {res}")
+                    logger.info("Fetching item by id: %s", item_id)
+                    res = get_table().get_item(Key={"id": item_id})
                     item = res.get("Item")
                     if not item:
                         response.update({"statusCode": 404, "body": json.dumps({"error": "Not found"})})
                     else:
-                        response.update({"statusCode": 200, "body": json.dumps(decimal_to_float(item))})
+                        response.update({"statusCode": 200, "body": to_json(item)})
+                elif params.get("ids"):
+                    ids = [i for i in params["ids"].split(",") if i]
+                    if len(ids) > MAX_BATCH_ITEMS:
+                        raise ValueError(f"At most {MAX_BATCH_ITEMS} ids per request")
+                    logger.info("Batch get of %d ids", len(ids))
+                    result = batch_get(ids)
+                    response.update({"statusCode": 200, "body": to_json(result)})
+                elif params.get("done"):
+                    limit = max(1, min(int(params.get("limit") or MAX_PAGE_LIMIT), MAX_PAGE_LIMIT))
+                    done = parse_bool(params["done"])
+                    logger.info("Querying %s: done=%s since=%s", STATUS_INDEX, done, params.get("since"))
+                    page = query_by_status(done, params.get("since"), limit, params.get("next_token"))
+                    response.update({"statusCode": 200, "body": to_json(page)})
+                elif params.get("since"):
+                    raise ValueError("since requires done=true or done=false")
+                elif params.get("limit") or params.get("next_token"):
+                    limit = max(1, min(int(params.get("limit") or MAX_PAGE_LIMIT), MAX_PAGE_LIMIT))
+                    logger.info("Scanning one page, limit=%d", limit)
+                    page = scan_page(limit, params.get("next_token"))
+                    response.update({"statusCode": 200, "body": to_json(page)})
                 else:
-                    logger.info("Scanning table for all items")
-                    res = table.scan()
-                    logger.info(f"Scan returned {len(res.get('Items', []))} items")
-                    response.update({"statusCode": 200, "body": json.dumps(decimal_to_float(res["Items"]))})
+                    logger.info("Scanning table for all items with %d segments", SCAN_SEGMENTS)
+                    items = scan_all()
+                    logger.info("Scan returned %d items", len(items))
+                    response.update({"statusCode": 200, "body": to_json(items)})
             # --- UPDATE ---
             case "PUT":
-                logger.info("Handling PUT request")
                 body = json.loads(event.get("body") or "{}")
-                logger.info(f"Parsed body: {body}")
+                logger.debug("Parsed body: %s", lazy_json(body))
                 item_id = path_id or body.get("id")
                 if not item_id:
                     logger.warning("Missing id in PUT request")
                     response.update({"body": json.dumps({"error": "Missing id"})})
                 else:
-                    logger.info(f"Updating item id={item_id}")
-                    table.update_item(
+                    logger.info("Updating item id=%s", item_id)
+                    get_table().update_item(
                         Key={"id": item_id},
-                        UpdateExpression="SET task=:t, done=:d",
+                        UpdateExpression="SET task=:t, done=:d, #status=:s",
+                        ExpressionAttributeNames={"#status": "status"},
                         ExpressionAttributeValues={
                             ":t": body.get("task", "no description"),
                             ":d": body.get("done", False),
+                            ":s": status_of(body.get("done", False)),
                         },
                     )
                     response.update({"statusCode": 200, "body": json.dumps({"message": "Updated"})})
 
             # --- DELETE ---
             case "DELETE":
-                logger.info("Handling DELETE request")
                 item_id = path_id
-                logger.info(f"Item id to delete: {item_id}")
-
-                logger.info(f"DELETE path_id={path_id}, key type={type(path_id)}")
-
-                logger.info(f"Deleting from table: {TABLE_NAME}")
+                logger.info("Item id to delete: %s", item_id)
 
+                body = json.loads(event.get("body") or "{}")
+                batch_ids = body.get("ids") if isinstance(body, dict) else None
 
-                if not item_id:
+                if batch_ids and not item_id:
+                    if not isinstance(batch_ids, list) or len(batch_ids) > MAX_BATCH_ITEMS:
+                        raise ValueError(f"ids must be a list of at most {MAX_BATCH_ITEMS} ids")
+                    logger.info("Batch delete of %d ids", len(batch_ids))
+                    result = batch_delete(batch_ids)
+                    response.update({"statusCode": 200, "body": json.dumps(result)})
+                elif not item_id:
                     logger.warning("Missing id in DELETE request")
                     response.update({"body": json.dumps({"error": "Missing id"})})
                 else:
-                    table.delete_item(Key={"id": item_id})
+                    get_table().delete_item(Key={"id": item_id})
                     response.update({"statusCode": 200, "body": json.dumps({"message": "Deleted"})})
 
             # --- DEFAULT ---
             case _:
-                logger.warning(f"Unsupported HTTP method: {method}")
+                logger.warning("Unsupported HTTP method: %s", method)
                 response.update({
                     "statusCode": 405,
                     "body": json.dumps({"error": f"Method {method} not allowed"})
                 })
 
+    except ValueError as e:
+        logger.warning("Bad request: %s", e)
+        response.update({"statusCode": 400, "body": json.dumps({"error": str(e)})})
+
     except Exception as e:
         logger.exception("Unhandled exception during Lambda execution")
         response.update({"statusCode": 500, "body": json.dumps({"error": str(e)})})
 
-    logger.info(f"Response: {response}")
+    logger.debug("Response: %s", lazy_json(response))
     return response
\ No newline at end of file
@@ -1,7 +1,14 @@
+import http.client
 import json
-import logging
+import os
+import threading
+import time
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from aws_clients import get_resource
+from request_logging import get_logger, log_request
+from timing import span
+from ttl_cache import TTLCache, single_flight
 
 '''
 curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather"
@@ -11,14 +18,57 @@ curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather"
 curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather?city=London"
 curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather?city=New%20York"
 curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather?city=Tokyo"
+# When open-meteo is slow or down, the last good forecast is returned with "stale": true
+'''
+
+'''
+Several cities in one call (looked up concurrently, up to 10):
+curl -s "https://u4pcumf51e.execute-api.us-east-1.amazonaws.com/api-weather?city=London,Tokyo,New%20York"
+# {"results": [{"city": "London", ...}, {"city": "Tokyo", ...}, {"query": "Nowhere", "error": "..."}]}
 '''
 
 # --- Logging setup ---
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = get_logger()
+
+# Overridable so the handler can be pointed at a local stub server
+GEOCODE_URL = os.environ.get("GEOCODE_URL", "https://geocoding-api.open-meteo.com/v1/search")
+FORECAST_URL = os.environ.get("FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+
+HTTP_TIMEOUT_SECONDS = 10
+HTTP_HEADERS = {"User-Agent": "t5-api-weather/1.0", "Accept": "application/json"}
+# Idle keep-alive connections kept per host; matches the batch concurrency
+MAX_POOL_SIZE = 8
+MAX_BATCH_CITIES = 10
+
+# Total time one request may spend waiting on open-meteo, kept well under
+# the API Gateway 30 s integration timeout. An uncached geocode may use at
+# most GEOCODE_BUDGET_SHARE of it so the forecast call still gets a turn.
+REQUEST_BUDGET_SECONDS = float(os.environ.get("REQUEST_BUDGET_SECONDS", "4"))
+GEOCODE_BUDGET_SHARE = 0.5
+# Left for building the response when the Lambda itself is about to time out
+DEADLINE_MARGIN_SECONDS = 0.5
+
+# Circuit breaker, per upstream host: after this many consecutive failures,
+# calls fail fast for BREAKER_RESET_SECONDS, then one probe is let through.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+
+# City -> coordinates never really changes; forecasts refresh every few minutes
+GEOCODE_TTL_SECONDS = int(os.environ.get("GEOCODE_TTL_SECONDS", str(7 * 24 * 3600)))
+GEOCODE_MISS_TTL_SECONDS = 600
+FORECAST_TTL_SECONDS = int(os.environ.get("FORECAST_TTL_SECONDS", "300"))
+# How long past expiry a value may still be served when the upstream is slow or down
+GEOCODE_STALE_SECONDS = 30 * 24 * 3600
+FORECAST_STALE_SECONDS = int(os.environ.get("FORECAST_STALE_SECONDS", str(6 * 3600)))
+# ~1 km; nearby lookups share a forecast entry
+COORD_PRECISION = 2
+
+# Optional shared tier across containers: a DynamoDB table with a "pk"
+# string hash key and TTL enabled on "ttl". Unset = container cache only.
+WEATHER_CACHE_TABLE = os.environ.get("WEATHER_CACHE_TABLE")
 
-GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
-FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+_geocode_cache = TTLCache(GEOCODE_TTL_SECONDS, max_entries=1024, stale_seconds=GEOCODE_STALE_SECONDS)
+_forecast_cache = TTLCache(FORECAST_TTL_SECONDS, max_entries=1024, stale_seconds=FORECAST_STALE_SECONDS)
 
 COMMON_HEADERS = {
     "Content-Type": "application/json",
@@ -27,33 +77,319 @@ COMMON_HEADERS = {
     "Access-Control-Allow-Headers": "Content-Type"
 }
 
+# --- HTTP connection pool ---
+# Connections live across warm invocations, so repeat lookups skip the
+# TCP and TLS handshakes.
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+class UpstreamError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+def _acquire(scheme, host):
+    with _pool_lock:
+        idle = _pool.get((scheme, host))
+        if idle:
+            return idle.pop(), True
+    conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+    return conn_cls(host, timeout=HTTP_TIMEOUT_SECONDS), False
+
+
+def _release(scheme, host, conn):
+    with _pool_lock:
+        idle = _pool.setdefault((scheme, host), [])
+        if len(idle) < MAX_POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+# --- Circuit breaker ---
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            # Half-open: let a single probe through, keep failing the rest fast
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return
+        raise CircuitOpenError(f"{self.name} circuit open")
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit for %s closed", self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+
+
+def breaker_for(host):
+    with _pool_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
 # --- Helpers ---
-def http_get(url):
-    logger.info(f"Fetching URL: {url}")
-    req = urllib.request.Request(url, headers={"User-Agent": "t5-api-weather/1.0"})
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.load(resp)
-        return data
-
-def geocode_city(city_name):
+def http_get(url, deadline=None):
+    """GET url and decode the JSON body, all of it done by deadline (a
+    time.monotonic() value; default HTTP_TIMEOUT_SECONDS from now)."""
+    logger.info("Fetching URL: %s", url)
+    if deadline is None:
+        deadline = time.monotonic() + HTTP_TIMEOUT_SECONDS
+    # Budget already spent: fail before touching the breaker, the upstream did nothing wrong
+    remaining(deadline)
+    parts = urllib.parse.urlsplit(url)
+    breaker = breaker_for(parts.netloc)
+    breaker.before_call()
+    try:
+        data = _http_get(parts, deadline)
+    except UpstreamError as e:
+        # A 4xx is our request's fault, not a sign the upstream is unhealthy
+        if e.status is not None and e.status < 500:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return data
+
+def _http_get(parts, deadline):
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    for attempt in range(2):
+        conn, reused = _acquire(parts.scheme, parts.netloc)
+        try:
+            # A socket timeout applies to each operation, not the whole call, so
+            # it is re-armed with what is left before connecting, before waiting
+            # for the headers and before every read of the body.
+            conn.timeout = remaining(deadline)
+            if conn.sock:
+                conn.sock.settimeout(conn.timeout)
+            with span("http." + parts.netloc):
+                conn.request("GET", path, headers=HTTP_HEADERS)
+                # Kept: getresponse() drops conn.sock when the server closes after this response
+                sock = conn.sock
+                sock.settimeout(remaining(deadline))
+                resp = conn.getresponse()
+                chunks = []
+                while True:
+                    sock.settimeout(remaining(deadline))
+                    chunk = resp.read1(64 * 1024)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                # Closes the response so the connection can go back to the pool
+                resp.read()
+                body = b"".join(chunks)
+        except (http.client.RemoteDisconnected, ConnectionError) as e:
+            conn.close()
+            # The server may have closed an idle pooled connection; retry once on a new one
+            if reused and attempt == 0:
+                logger.info("Stale pooled connection (%s), reconnecting", e)
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            _release(parts.scheme, parts.netloc, conn)
+        if resp.status >= 400:
+            raise UpstreamError(f"{parts.netloc} returned HTTP {resp.status}", resp.status)
+        return json.loads(body)
+
+def time_left(deadline):
+    return max(deadline - time.monotonic(), 0.0)
+
+def remaining(deadline):
+    """Seconds left before deadline; TimeoutError once there are none
+    (a zero socket timeout would mean non-blocking, not "give up")."""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("No time left in the request budget")
+    return left
+
+def shared_get(key):
+    if not WEATHER_CACHE_TABLE:
+        return None
+    try:
+        item = get_resource("dynamodb").Table(WEATHER_CACHE_TABLE).get_item(Key={"pk": key}).get("Item")
+    except Exception as e:
+        logger.warning("Shared cache read failed: %s", e)
+        return None
+    if item and int(item["ttl"]) > time.time():
+        return json.loads(item["value"])
+    return None
+
+def shared_put(key, value, ttl_seconds):
+    if not WEATHER_CACHE_TABLE:
+        return
+    try:
+        get_resource("dynamodb").Table(WEATHER_CACHE_TABLE).put_item(Item={
+            "pk": key, "value": json.dumps(value), "ttl": int(time.time()) + ttl_seconds,
+        })
+    except Exception as e:
+        logger.warning("Shared cache write failed: %s", e)
+
+def cached_lookup(cache, key, ttl_seconds, loader, deadline):
+    """Returns (value, is_stale). loader(deadline) fetches from the upstream."""
+    value = cache.get(key)
+    if value is not None:
+        return value, False
+    value = shared_get(key)
+    if value is not None:
+        cache.put(key, value, ttl_seconds)
+        return value, False
+
+    def load():
+        fresh = loader(deadline)
+        # Cache misses too (briefly, as False) so unknown cities don't hammer the upstream
+        cache.put(key, fresh or False, ttl_seconds if fresh else GEOCODE_MISS_TTL_SECONDS)
+        if fresh:
+            shared_put(key, fresh, ttl_seconds)
+        return fresh
+
+    stale = cache.get_stale(key)
+    if stale is None:
+        # Concurrent misses for the same key share one upstream call
+        return single_flight(key, load), False
+
+    # Something to fall back on: refresh within the request's budget, and if
+    # it is slow or failing serve the stale value. The refresh is not left
+    # running once the request is answered; Lambda freezes the environment
+    # after the handler returns, so the next request past the TTL retries it.
+    try:
+        return single_flight(key, load), False
+    except TimeoutError:
+        logger.warning("Refresh of %s over budget, serving stale", key)
+    except Exception as e:
+        logger.warning("Refresh of %s failed (%s), serving stale", key, e)
+    return stale, True
+
+def geocode_city(city_name, deadline):
+    key = "geo#" + " ".join(city_name.lower().split())
+    geo, _ = cached_lookup(_geocode_cache, key, GEOCODE_TTL_SECONDS, lambda d: fetch_geocode(city_name, d),
+                           time.monotonic() + time_left(deadline) * GEOCODE_BUDGET_SHARE)
+    return tuple(geo) if geo else None
+
+def get_weather(lat, lon, deadline):
+    """Returns (current_weather or None, is_stale)."""
+    lat, lon = round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+    key = f"wx#{lat}#{lon}"
+    weather, stale = cached_lookup(_forecast_cache, key, FORECAST_TTL_SECONDS, lambda d: fetch_weather(lat, lon, d),
+                                   deadline)
+    return weather or None, stale
+
+def fetch_geocode(city_name, deadline):
     q = urllib.parse.urlencode({"name": city_name, "count": 1})
     url = f"{GEOCODE_URL}?{q}"
-    data = http_get(url)
+    data = http_get(url, deadline)
     results = data.get("results")
     if results:
         r = results[0]
-        return r["latitude"], r["longitude"], r["name"]
+        return [r["latitude"], r["longitude"], r["name"]]
     return None
 
-def get_weather(lat, lon):
+def fetch_weather(lat, lon, deadline):
     q = urllib.parse.urlencode({"latitude": lat, "longitude": lon, "current_weather": "true"})
     url = f"{FORECAST_URL}?{q}"
-    data = http_get(url)
+    data = http_get(url, deadline)
     return data.get("current_weather")
 
+def request_deadline(context):
+    budget = REQUEST_BUDGET_SECONDS
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        budget = min(budget, context.get_remaining_time_in_millis() / 1000 - DEADLINE_MARGIN_SECONDS)
+    return time.monotonic() + max(budget, 0.0)
+
+def upstream_failure(city, e):
+    logger.warning("Lookup failed for %s: %s", city, e)
+    if isinstance(e, CircuitOpenError):
+        return 503, {"error": "Weather service temporarily unavailable"}
+    if isinstance(e, TimeoutError):
+        return 504, {"error": "Weather service timed out"}
+    return 502, {"error": str(e)}
+
+def lookup_city(city, deadline):
+    """Returns (status_code, body) for one city."""
+    try:
+        geo = geocode_city(city, deadline)
+        if not geo:
+            return 404, {"error": f"City '{city}' not found"}
+
+        lat, lon, resolved_name = geo
+        weather, stale = get_weather(lat, lon, deadline)
+    except Exception as e:
+        return upstream_failure(city, e)
+
+    if not weather:
+        return 502, {"error": "Weather data unavailable"}
+
+    body = {
+        "city": resolved_name,
+        "temperature_C": weather.get("temperature"),
+        "windspeed_m_s": weather.get("windspeed"),
+        "weather_code": weather.get("weathercode"),
+        "time": weather.get("time")
+    }
+    if stale:
+        body["stale"] = True
+    return 200, body
+
+def lookup_many(cities, deadline):
+    def one(city):
+        status, body = lookup_city(city, deadline)
+        return body if status == 200 else {"query": city, **body}
+
+    with ThreadPoolExecutor(max_workers=min(len(cities), MAX_POOL_SIZE)) as pool:
+        return list(pool.map(one, cities))
+
 # --- Lambda entrypoint ---
+@log_request
 def lambda_handler(event, context):
-    logger.info(f"Event received: {json.dumps(event)}")
     method = event.get("requestContext", {}).get("http", {}).get("method", "")
 
     # Handle CORS preflight
@@ -67,34 +403,18 @@ def lambda_handler(event, context):
         city = "Buenos Aires"
         logger.info("No city provided, defaulting to Buenos Aires")
 
-    geo = geocode_city(city)
-    if not geo:
-        return {
-            "statusCode": 404,
-            "headers": COMMON_HEADERS,
-            "body": json.dumps({"error": f"City '{city}' not found"})
-        }
-
-    lat, lon, resolved_name = geo
-    weather = get_weather(lat, lon)
-
-    if not weather:
-        return {
-            "statusCode": 502,
-            "headers": COMMON_HEADERS,
-            "body": json.dumps({"error": "Weather data unavailable"})
-        }
-
-    response_body = {
-        "city": resolved_name,
-        "temperature_C": weather.get("temperature"),
-        "windspeed_m_s": weather.get("windspeed"),
-        "weather_code": weather.get("weathercode"),
-        "time": weather.get("time")
-    }
+    cities = list(dict.fromkeys(c.strip() for c in city.split(",") if c.strip()))
+    if len(cities) > 1:
+        if len(cities) > MAX_BATCH_CITIES:
+            status, body = 400, {"error": f"At most {MAX_BATCH_CITIES} cities per request"}
+        else:
+            status, body = 200, {"results": lookup_many(cities, request_deadline(context))}
+    else:
+        status, body = lookup_city(cities[0] if cities else city, request_deadline(context))
 
+    logger.info("Cache stats: geocode=%s forecast=%s", _geocode_cache.stats, _forecast_cache.stats)
     return {
-        "statusCode": 200,
+        "statusCode": status,
         "headers": COMMON_HEADERS,
-        "body": json.dumps(response_body)
+        "body": json.dumps(body)
     }
@@ -0,0 +1,106 @@
+"""
+Cold-start harness: import time and package size per Lambda handler.
+
+Each handler is imported in a fresh isolated interpreter (python -I -X
+importtime) with its own directory, ../common and its built tmp_deps on
+sys.path, the way the Lambda runtime would load it. Reports the median
+cumulative import time of lambda_handler over several runs, the heaviest
+imports, and the size of lambda_payload.zip when it has been built.
+
+python3 bench_cold_start.py                       # all handlers
+python3 bench_cold_start.py api-rds api-todo      # some
+python3 bench_cold_start.py --json now.json --baseline before.json
+    # exits 1 if any handler's import time grew more than --tolerance
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SCRIPTS = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+COMMON = os.path.join(SCRIPTS, "common")
+
+# Enough for every handler to import outside AWS
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "TOPIC_ARN": "arn:aws:sns:us-east-1:000000000000:local",
+    "QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/000000000000/local",
+    "SECRET_ARN": "local",
+    "DB_HOST": "localhost",
+}
+
+
+def import_profile(handler_dir):
+    paths = [handler_dir, COMMON, os.path.join(handler_dir, "tmp_deps")]
+    code = f"import sys; sys.path[:0] = {paths!r}; import lambda_handler"
+    proc = subprocess.run(
+        [sys.executable, "-I", "-X", "importtime", "-c", code],
+        env={**os.environ, **ENV}, capture_output=True, text=True, cwd=handler_dir,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total_us, modules = None, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.strip()))
+        if name.strip() == "lambda_handler":
+            total_us = int(cumulative_us)
+    return total_us, modules
+
+
+def measure(name, runs):
+    handler_dir = os.path.join(SCRIPTS, name)
+    totals, modules = [], []
+    for _ in range(runs):
+        total_us, modules = import_profile(handler_dir)
+        totals.append(total_us)
+    zip_path = os.path.join(handler_dir, "lambda_payload.zip")
+    heaviest = sorted(modules, key=lambda m: m[1], reverse=True)[:3]
+    return {
+        "handler": name,
+        "import_ms": round(statistics.median(totals) / 1000, 2),
+        "package_bytes": os.path.getsize(zip_path) if os.path.exists(zip_path) else None,
+        "heaviest_self_ms": {m[2]: round(m[1] / 1000, 2) for m in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("handlers", nargs="*")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed import time growth (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    names = args.handlers or sorted(d for d in os.listdir(SCRIPTS) if d.startswith("api-"))
+    results = [measure(n, args.runs) for n in names]
+
+    for r in results:
+        size = f"{r['package_bytes'] / 1e6:6.2f}MB" if r["package_bytes"] else "  (not built)"
+        print(f"{r['handler']:<12} import={r['import_ms']:8.2f}ms  zip={size}  heaviest={r['heaviest_self_ms']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = {r["handler"]: r for r in json.load(f)}
+        regressions = [
+            r for r in results
+            if r["handler"] in before and r["import_ms"] > before[r["handler"]]["import_ms"] * (1 + args.tolerance)
+        ]
+        for r in regressions:
+            print(f"REGRESSION {r['handler']}: {before[r['handler']]['import_ms']}ms -> {r['import_ms']}ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
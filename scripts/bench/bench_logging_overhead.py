@@ -0,0 +1,88 @@
+"""
+Per-invocation logging overhead: the old pattern (json.dumps of the whole
+event plus eager f-string body/response dumps at INFO) vs the shared
+request_logging module (sampled, lazy, redacted). Output goes to a
+StreamHandler on /dev/null so formatting and I/O cost are included.
+Pure stdlib; no AWS needed.
+
+python3 bench_logging_overhead.py
+"""
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+import request_logging as rl  # noqa: E402
+
+N = int(os.environ.get("BENCH_N", "20000"))
+
+EVENT = {
+    "version": "2.0",
+    "routeKey": "POST /api-todo",
+    "rawPath": "/api-todo",
+    "rawQueryString": "",
+    "headers": {
+        "accept": "*/*", "content-type": "application/json", "host": "api.aws-serverless.net",
+        "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+        "origin": "https://aws-serverless.net", "referer": "https://aws-serverless.net/demo/dash/todo/",
+        "x-amzn-trace-id": "Root=1-6543a1b2-0123456789abcdef01234567",
+        "x-forwarded-for": "203.0.113.10", "x-forwarded-port": "443", "x-forwarded-proto": "https",
+    },
+    "requestContext": {
+        "accountId": "123456789012", "apiId": "u4pcumf51e", "domainName": "api.aws-serverless.net",
+        "http": {"method": "POST", "path": "/api-todo", "protocol": "HTTP/1.1",
+                 "sourceIp": "203.0.113.10", "userAgent": "Mozilla/5.0"},
+        "requestId": "NsF3xjw2IAMEVxw=", "routeKey": "POST /api-todo", "stage": "$default",
+        "time": "26/Oct/2025:21:30:45 +0000", "timeEpoch": 1761514245000,
+    },
+    "body": json.dumps({"task": "buy milk and eggs", "ttl_seconds": 600}),
+    "isBase64Encoded": False,
+}
+RESPONSE = {"statusCode": 201, "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"item": {"id": "20251026213045123456a1b2c3", "task": "buy milk"}})}
+
+
+def setup():
+    logger = logging.getLogger()
+    logger.handlers[:] = [logging.StreamHandler(open(os.devnull, "w"))]
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def before(logger):
+    def handler(event, context):
+        logger.info(f"Incoming event: {json.dumps(event)}")
+        body = json.loads(event["body"])
+        logger.info(f"Parsed body: {body}")
+        logger.info(f"Response: {RESPONSE}")
+        return RESPONSE
+    return handler
+
+
+def after(logger):
+    @rl.log_request
+    def handler(event, context):
+        body = json.loads(event["body"])
+        logger.debug("Parsed body: %s", rl.lazy_json(body))
+        logger.debug("Response: %s", rl.lazy_json(RESPONSE))
+        return RESPONSE
+    return handler
+
+
+def run(name, handler):
+    t0 = time.perf_counter()
+    # log_request's timing EMF line goes to stdout; count it, don't show it
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(N):
+            handler(EVENT, None)
+    print(f"{name:<8} {(time.perf_counter() - t0) / N * 1e6:8.1f}us per invocation")
+
+
+if __name__ == "__main__":
+    logger = setup()
+    run("before", before(logger))
+    run("after", after(logger))
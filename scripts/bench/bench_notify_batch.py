@@ -0,0 +1,96 @@
+"""
+api-notify publish throughput in messages/sec through the handler: one
+POST (one sns.publish) per message vs batch POSTs (PublishBatch x10).
+Half the messages carry severity=high, and an SQS queue subscribed with a
+filter policy on it shows server-side filtering of the attributes.
+
+Runs in-process on moto by default:
+
+pip install "moto[sns,sqs]" boto3
+python3 bench_notify_batch.py
+
+or against LocalStack via SNS_ENDPOINT (also used for SQS):
+
+docker run --rm -p 4566:4566 localstack/localstack
+SNS_ENDPOINT=http://localhost:4566 python3 bench_notify_batch.py
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-notify"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+N = int(os.environ.get("BENCH_N", "1000"))
+ENDPOINT = os.environ.get("SNS_ENDPOINT")
+
+
+def local_aws():
+    if ENDPOINT:
+        os.environ["AWS_ENDPOINT_URL_SNS"] = ENDPOINT
+        os.environ["AWS_ENDPOINT_URL_SQS"] = ENDPOINT
+        return contextlib.nullcontext()
+    from moto import mock_aws
+    return mock_aws()
+
+
+def invoke(h, body):
+    event = {"requestContext": {"http": {"method": "POST"}}, "body": json.dumps(body)}
+    res = h.lambda_handler(event, None)
+    assert res["statusCode"] == 200, res
+    return json.loads(res["body"])
+
+
+def message(i):
+    return {"message": f"notification {i}", "subject": "bench",
+            "attributes": {"severity": "high" if i % 2 else "low", "seq": i}}
+
+
+def timed(name, fn):
+    t0 = time.perf_counter()
+    calls = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<14} {N / elapsed:9.0f} msgs/sec  ({calls} invocations, {elapsed:.2f}s)")
+
+
+def publish_batches(h):
+    calls = 0
+    for j in range(0, N, h.MAX_BATCH_ENTRIES):
+        assert invoke(h, {"messages": [message(i) for i in range(j, min(j + h.MAX_BATCH_ENTRIES, N))]})["failed"] == 0
+        calls += 1
+    return calls
+
+
+def count_messages(sqs, queue_url):
+    attrs = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["ApproximateNumberOfMessages"])
+    return int(attrs["Attributes"]["ApproximateNumberOfMessages"])
+
+
+if __name__ == "__main__":
+    with local_aws():
+        sns, sqs = boto3.client("sns"), boto3.client("sqs")
+        topic_arn = sns.create_topic(Name=f"bench-notify-{int(time.time())}")["TopicArn"]
+        os.environ["TOPIC_ARN"] = topic_arn
+
+        # Subscriber that only wants severity=high
+        queue_url = sqs.create_queue(QueueName=f"bench-notify-high-{int(time.time())}")["QueueUrl"]
+        queue_arn = sqs.get_queue_attributes(QueueUrl=queue_url, AttributeNames=["QueueArn"])["Attributes"]["QueueArn"]
+        sns.subscribe(TopicArn=topic_arn, Protocol="sqs", Endpoint=queue_arn,
+                      Attributes={"FilterPolicy": json.dumps({"severity": ["high"]})})
+
+        import lambda_handler as h
+        h.logger.setLevel("WARNING")
+
+        timed("single publish", lambda: [invoke(h, message(i)) for i in range(N)] and N)
+        delivered = count_messages(sqs, queue_url)
+        timed("batch publish", lambda: publish_batches(h))
+        print(f"filtered subscriber received {delivered} of {N} (single), "
+              f"{count_messages(sqs, queue_url) - delivered} of {N} (batch)")
@@ -0,0 +1,61 @@
+"""
+api-notify GET: subscription listing on a topic seeded with thousands of
+subscriptions. Compares the old single list_subscriptions_by_topic call
+(first page only), the full page walk on a cold cache, and repeated
+listings served from the container cache, plus the cost after a PUT
+invalidates it.
+
+Same local SNS options as bench_notify_batch.py (moto by default,
+SNS_ENDPOINT for LocalStack).
+
+python3 bench_notify_subscriptions.py
+"""
+import json
+import os
+import statistics
+import time
+
+from bench_notify_batch import local_aws
+
+import boto3
+
+SUBSCRIPTIONS = int(os.environ.get("BENCH_SUBSCRIPTIONS", "3000"))
+REPEATS = int(os.environ.get("BENCH_REPEATS", "20"))
+
+
+def invoke(h, method, body=None, qs=None):
+    event = {"requestContext": {"http": {"method": method}}, "queryStringParameters": qs,
+             "body": json.dumps(body) if body is not None else None}
+    res = h.lambda_handler(event, None)
+    assert res["statusCode"] == 200, res
+    return json.loads(res["body"])
+
+
+def timed(name, fn, repeats=1):
+    runs = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        count = fn()
+        runs.append((time.perf_counter() - t0) * 1000)
+    print(f"{name:<28} {statistics.median(runs):9.2f}ms  subscriptions={count}")
+
+
+if __name__ == "__main__":
+    with local_aws():
+        sns = boto3.client("sns")
+        topic_arn = sns.create_topic(Name=f"bench-subs-{int(time.time())}")["TopicArn"]
+        os.environ["TOPIC_ARN"] = topic_arn
+        for i in range(SUBSCRIPTIONS):
+            sns.subscribe(TopicArn=topic_arn, Protocol="sqs", Endpoint=f"arn:aws:sqs:us-east-1:000000000000:bench-{i}")
+
+        import lambda_handler as h
+        h.logger.setLevel("WARNING")
+
+        timed("single call (old)", lambda: len(sns.list_subscriptions_by_topic(TopicArn=topic_arn)["Subscriptions"]))
+        timed("full walk, cold cache", lambda: (h._subscription_cache.invalidate(), invoke(h, "GET")["count"])[1],
+              repeats=3)
+        timed("full list, cached", lambda: invoke(h, "GET")["count"], repeats=REPEATS)
+        timed("page of 100, cached", lambda: len(invoke(h, "GET", qs={"limit": "100"})["subscriptions"]),
+              repeats=REPEATS)
+        invoke(h, "PUT", {"protocol": "sqs", "endpoint": "arn:aws:sqs:us-east-1:000000000000:bench-new"})
+        timed("first list after PUT", lambda: invoke(h, "GET")["count"])
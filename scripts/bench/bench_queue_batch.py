@@ -0,0 +1,95 @@
+"""
+api-queue throughput in messages/sec through the handler: one invocation
+per message vs the batch forms (send, receive with max/wait, delete).
+
+Runs in-process on moto by default:
+
+pip install "moto[sqs]" boto3
+python3 bench_queue_batch.py
+
+or against ElasticMQ (or any SQS-compatible endpoint) via SQS_ENDPOINT:
+
+docker run --rm -p 9324:9324 softwaremill/elasticmq-native
+SQS_ENDPOINT=http://localhost:9324 python3 bench_queue_batch.py
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-queue"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+N = int(os.environ.get("BENCH_N", "1000"))
+ENDPOINT = os.environ.get("SQS_ENDPOINT")
+
+
+def local_aws():
+    if ENDPOINT:
+        os.environ["AWS_ENDPOINT_URL_SQS"] = ENDPOINT
+        return contextlib.nullcontext()
+    from moto import mock_aws
+    return mock_aws()
+
+
+def invoke(h, method, body=None, qs=None):
+    event = {"requestContext": {"http": {"method": method}}, "queryStringParameters": qs,
+             "body": json.dumps(body) if body is not None else None}
+    res = h.lambda_handler(event, None)
+    assert res["statusCode"] == 200, res
+    return json.loads(res["body"])
+
+
+def timed(name, fn):
+    t0 = time.perf_counter()
+    count, calls = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<22} {count / elapsed:9.0f} msgs/sec  ({count} msgs, {calls} invocations, {elapsed:.2f}s)")
+
+
+def drain(h, qs, batch_delete):
+    count = calls = 0
+    while count < N:
+        messages = invoke(h, "GET", qs=qs)
+        calls += 1
+        if not messages:
+            break
+        handles = [m["ReceiptHandle"] for m in messages]
+        if batch_delete:
+            assert invoke(h, "DELETE", {"receiptHandles": handles})["failed"] == 0
+            calls += 1
+        else:
+            for handle in handles:
+                invoke(h, "DELETE", {"receiptHandle": handle})
+                calls += 1
+        count += len(messages)
+    return count, calls
+
+
+def send_batches(h):
+    calls = 0
+    for j in range(0, N, h.MAX_BATCH_ENTRIES):
+        res = invoke(h, "POST", {"messages": [f"batch {i}" for i in range(j, min(j + h.MAX_BATCH_ENTRIES, N))]})
+        assert res["failed"] == 0
+        calls += 1
+    return N, calls
+
+
+if __name__ == "__main__":
+    with local_aws():
+        queue_url = boto3.client("sqs").create_queue(QueueName=f"bench-queue-{int(time.time())}")["QueueUrl"]
+        os.environ["QUEUE_URL"] = queue_url
+        import lambda_handler as h
+        h.logger.setLevel("WARNING")
+
+        timed("single send", lambda: ([invoke(h, "POST", {"message": f"single {i}"}) for i in range(N)] and (N, N)))
+        timed("single receive+delete", lambda: drain(h, None, batch_delete=False))
+        timed("batch send", lambda: send_batches(h))
+        timed("batch receive+delete", lambda: drain(h, {"max": str(h.MAX_RECEIVE), "wait": "1"}, batch_delete=True))
@@ -0,0 +1,61 @@
+"""
+Insert throughput for api-rds: one create_contact() per row (one commit
+each) vs bulk_upsert_contacts() in batches.
+
+Same local Postgres setup as bench_rds_connection.py.
+
+PGUSER=postgres PGPASSWORD=postgres python3 bench_rds_bulk.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-rds"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("SECRET_ARN", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+ROWS = int(os.environ.get("BENCH_ROWS", "5000"))
+BATCH = int(os.environ.get("BENCH_BATCH", str(h.MAX_BULK_ITEMS)))
+CREDS = {
+    "username": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "postgres"),
+}
+
+
+def contacts(n):
+    return [{"name": f"bench {i}", "email": f"bench{i}@example.com", "phone": "555-0000"}
+            for i in range(n)]
+
+
+def single_row(conn, rows):
+    for row in rows:
+        h.create_contact(conn, row)
+
+
+def bulk(conn, rows):
+    for i in range(0, len(rows), BATCH):
+        h.bulk_upsert_contacts(conn, rows[i:i + BATCH])
+
+
+def run(name, fn, conn):
+    rows = contacts(ROWS)
+    t0 = time.perf_counter()
+    fn(conn, rows)
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<12} {ROWS / elapsed:10.0f} rows/sec  ({elapsed:.2f}s for {ROWS} rows)")
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("WARNING")
+    conn = h.open_db_connection(CREDS)
+    h.run_migrations(conn)
+    run("single-row", single_row, conn)
+    run(f"bulk x{BATCH}", bulk, conn)
+    cur = conn.cursor()
+    cur.execute("DELETE FROM demo_contacts WHERE email LIKE %s", ("bench%@example.com",))
+    conn.commit()
+    conn.close()
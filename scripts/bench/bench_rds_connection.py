@@ -0,0 +1,64 @@
+"""
+Warm-path latency for api-rds: per-request connect (old behaviour) vs the
+container-scoped connection.
+
+Needs a local Postgres with a `maindb` database on port 5432, e.g.
+
+docker run --rm -p 5432:5432 -e POSTGRES_PASSWORD=postgres -e POSTGRES_DB=maindb postgres:16
+
+PGUSER=postgres PGPASSWORD=postgres python3 bench_rds_connection.py
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-rds"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("SECRET_ARN", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+N = int(os.environ.get("BENCH_N", "200"))
+CREDS = {
+    "username": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "postgres"),
+}
+
+# Pre-seed the secret cache so no Secrets Manager call is made locally
+h._secret_cache["creds"] = CREDS
+h._secret_cache["fetched_at"] = time.monotonic()
+# Measure the connection path, not the response cache
+h.CACHE_TTL_SECONDS = 0
+
+EVENT = {"requestContext": {"http": {"method": "GET"}}, "pathParameters": {"id": "1"}}
+
+
+def per_request_connect():
+    conn = h.open_db_connection(CREDS)
+    h.run_migrations(conn)
+    h.get_contact_by_id(conn, 1)
+    conn.close()
+
+
+def warm_handler():
+    h.lambda_handler(EVENT, None)
+
+
+def run(name, fn):
+    fn()  # warm up
+    samples = []
+    for _ in range(N):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"{name:<22} p50={statistics.median(samples):7.2f}ms "
+          f"p95={samples[int(len(samples) * 0.95) - 1]:7.2f}ms  n={N}")
+
+
+if __name__ == "__main__":
+    run("before (connect+DDL)", per_request_connect)
+    run("after (reused conn)", warm_handler)
@@ -0,0 +1,60 @@
+"""
+Point lookups by id on api-rds: plain cursor.execute() (parsed every call)
+vs the per-connection prepared statement used by get_contact_by_id().
+
+Same local Postgres setup as bench_rds_connection.py.
+
+PGUSER=postgres PGPASSWORD=postgres python3 bench_rds_prepared.py
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-rds"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("SECRET_ARN", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+N = int(os.environ.get("BENCH_N", "5000"))
+CREDS = {
+    "username": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "postgres"),
+}
+
+
+def unprepared(conn, contact_id):
+    cur = conn.cursor()
+    cur.execute("SELECT id, name, email, phone, created_at FROM demo_contacts WHERE id = %s", (contact_id,))
+    cur.fetchone()
+    cur.close()
+    conn.commit()
+
+
+def prepared(conn, contact_id):
+    h.get_contact_by_id(conn, contact_id)
+
+
+def run(name, fn, conn, contact_id):
+    fn(conn, contact_id)  # warm up
+    samples = []
+    for _ in range(N):
+        t0 = time.perf_counter()
+        fn(conn, contact_id)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    print(f"{name:<12} p50={statistics.median(samples):8.1f}us  mean={statistics.fmean(samples):8.1f}us  n={N}")
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("WARNING")
+    conn = h.open_db_connection(CREDS)
+    h.run_migrations(conn)
+    contact_id = h.create_contact(conn, {"name": "bench", "email": "bench@example.com"})["id"]
+    run("unprepared", unprepared, conn, contact_id)
+    run("prepared", prepared, conn, contact_id)
+    print("stats:", h._prepared_stats)
+    h.delete_contact(conn, contact_id)
+    conn.close()
@@ -0,0 +1,175 @@
+"""
+Read/write splitting on api-rds: throughput of a read-heavy mix with
+everything on the primary vs GETs on a streaming replica, plus a
+read-your-writes check.
+
+Needs a primary and a streaming replica, e.g.
+
+docker network create pgrepl
+docker run -d --rm --name pg-primary --network pgrepl -p 5432:5432 \\
+  -e POSTGRESQL_REPLICATION_MODE=master -e POSTGRESQL_REPLICATION_USER=repl \\
+  -e POSTGRESQL_REPLICATION_PASSWORD=repl -e POSTGRESQL_PASSWORD=postgres \\
+  -e POSTGRESQL_DATABASE=maindb bitnami/postgresql:16
+docker run -d --rm --name pg-replica --network pgrepl -p 5433:5432 \\
+  -e POSTGRESQL_REPLICATION_MODE=slave -e POSTGRESQL_MASTER_HOST=pg-primary \\
+  -e POSTGRESQL_REPLICATION_USER=repl -e POSTGRESQL_REPLICATION_PASSWORD=repl \\
+  -e POSTGRESQL_PASSWORD=postgres bitnami/postgresql:16
+
+The handler always connects on 5432, so the replica is reached through a
+second loopback address forwarded to 5433 (or run it on another host):
+
+sudo iptables -t nat -A OUTPUT -d 127.0.0.2 -p tcp --dport 5432 -j DNAT --to 127.0.0.1:5433
+
+(Without Docker: pg_basebackup -R a second data directory and start it with
+listen_addresses = '127.0.0.2'.)
+
+Both servers and every worker share the machine's CPUs, so the split can
+only show higher throughput with cores to spare; on a single core it
+mostly shows where the reads land (the "replica share" of transactions).
+
+PGUSER=postgres PGPASSWORD=postgres BENCH_READER_HOST=127.0.0.2 python3 bench_rds_replica.py
+"""
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-rds"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("SECRET_ARN", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+READER_HOST = os.environ.get("BENCH_READER_HOST", "127.0.0.2")
+SEED = int(os.environ.get("BENCH_SEED", "1000"))
+DURATION = float(os.environ.get("BENCH_SECONDS", "10"))
+WORKERS = [int(w) for w in os.environ.get("BENCH_WORKERS", "1,4,8,16").split(",")]
+# Share of requests that are PUTs; the rest are GET by id and GET list
+WRITE_RATIO = float(os.environ.get("BENCH_WRITE_RATIO", "0.1"))
+CREDS = {
+    "username": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "postgres"),
+}
+
+# Pre-seed the secret cache so no Secrets Manager call is made locally
+h._secret_cache["creds"] = CREDS
+h._secret_cache["fetched_at"] = time.monotonic()
+# Measure the database, not the response cache
+h.CACHE_TTL_SECONDS = 0
+
+
+def event(method, contact_id=None, body=None, headers=None, qs=None):
+    return {
+        "requestContext": {"http": {"method": method}},
+        "pathParameters": {"id": str(contact_id)} if contact_id else None,
+        "queryStringParameters": qs,
+        "headers": headers or {},
+        "body": json.dumps(body) if body else None,
+    }
+
+
+def seed(ids):
+    h.READER_HOST = ""
+    for j in range(0, SEED, h.MAX_BULK_ITEMS):
+        res = h.lambda_handler(event("POST", body=[
+            {"name": f"Replica {k}", "email": f"replica{k}@example.com"} for k in range(j, min(j + h.MAX_BULK_ITEMS, SEED))
+        ]), None)
+        ids.extend(r["id"] for r in json.loads(res["body"])["results"])
+    # Wait for the replica to have every row before measuring
+    reader = h.open_db_connection(CREDS, READER_HOST)
+    cur = reader.cursor()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        cur.execute("SELECT count(*) FROM demo_contacts WHERE id = ANY(%s)", (ids,))
+        if cur.fetchone()[0] == len(ids):
+            break
+        reader.commit()
+        time.sleep(0.1)
+    reader.close()
+
+
+def worker(args):
+    reader_host, ids, seed_value = args
+    # Forked "container": its own connections, nothing inherited from the parent
+    h._conn = h._reader_conn = None
+    h._prepared.clear()
+    h.READER_HOST = reader_host
+    # Only stickiness from this worker's own writes, as in a real container
+    h._recent_writes.clear()
+    rng = random.Random(seed_value)
+    done = errors = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        contact_id = rng.choice(ids)
+        roll = rng.random()
+        if roll < WRITE_RATIO:
+            ev = event("PUT", contact_id, {"name": f"Replica {contact_id} {done}", "email": "r@example.com"})
+        elif roll < WRITE_RATIO + (1 - WRITE_RATIO) / 2:
+            ev = event("GET", contact_id)
+        else:
+            ev = event("GET", qs={"limit": "50", "cursor": h.encode_cursor(contact_id)})
+        done += 1
+        if h.lambda_handler(ev, None)["statusCode"] != 200:
+            errors += 1
+    return done, errors
+
+
+def commits(host):
+    conn = h.open_db_connection(CREDS, host)
+    cur = conn.cursor()
+    cur.execute("SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()")
+    count = cur.fetchone()[0]
+    conn.close()
+    return count
+
+
+def throughput(label, reader_host, ids, workers):
+    before = commits(None), commits(READER_HOST)
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Pool(workers) as pool:
+        results = pool.map(worker, [(reader_host, ids, i) for i in range(workers)])
+    done = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    time.sleep(1)  # backends flush their stats on exit
+    on_primary, on_replica = commits(None) - before[0], commits(READER_HOST) - before[1]
+    print(f"{label:<10} workers={workers:<3} {done / DURATION:9.1f} req/s  errors={errors}  "
+          f"replica share={on_replica / max(1, on_primary + on_replica):.0%}")
+    return done / DURATION
+
+
+def read_your_writes(ids, n=200):
+    """Stale reads seen right after a write: no stickiness, stickiness, header."""
+    h._conn = h._reader_conn = None
+    h._prepared.clear()
+    h.READER_HOST = READER_HOST
+    for label, sticky_seconds, headers in (("no stickiness", 0, {}),
+                                           ("sticky window", 5, {}),
+                                           ("consistent header", 0, {"x-consistent-read": "true"})):
+        h.READ_AFTER_WRITE_SECONDS = sticky_seconds
+        stale = 0
+        for i in range(n):
+            contact_id = ids[i % len(ids)]
+            name = f"ryw {label} {i}"
+            h.lambda_handler(event("PUT", contact_id, {"name": name, "email": "r@example.com"}), None)
+            got = json.loads(h.lambda_handler(event("GET", contact_id, headers=headers), None)["body"])
+            stale += got.get("name") != name
+        print(f"{label:<18} stale reads={stale}/{n}")
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("WARNING")
+    h.run_migrations(h.open_db_connection(CREDS))
+    ids = []
+    seed(ids)
+    print(f"seeded {len(ids)} contacts, {WRITE_RATIO:.0%} writes, {os.cpu_count()} CPU(s)\n")
+
+    for workers in WORKERS:
+        primary = throughput("primary", "", ids, workers)
+        split = throughput("split", READER_HOST, ids, workers)
+        print(f"{'':<10} split/primary = {split / primary:.2f}x\n")
+
+    read_your_writes(ids)
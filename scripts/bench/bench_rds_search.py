@@ -0,0 +1,133 @@
+"""
+?email= and ?name_prefix= lookups on api-rds at 1M rows: the indexes from
+migrations 2 and 3 vs the sequential scan the same queries get without them.
+
+Runs the handler's own migrations and search_contacts() in a separate
+bench_search schema, so the demo_contacts table in maindb is left alone.
+Seeding 1M rows takes a few seconds and is kept for the next run;
+BENCH_DROP=1 drops the schema afterwards.
+
+Same local Postgres setup as bench_rds_connection.py.
+
+PGUSER=postgres PGPASSWORD=postgres python3 bench_rds_search.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-rds"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("SECRET_ARN", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+ROWS = int(os.environ.get("BENCH_ROWS", "1000000"))
+N = int(os.environ.get("BENCH_N", "500"))
+# A sequential scan of 1M rows is ~100ms; a few samples are enough
+SCAN_N = int(os.environ.get("BENCH_SCAN_N", "10"))
+SCHEMA = "bench_search"
+CREDS = {
+    "username": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "postgres"),
+}
+
+
+def connect(index_scans=True):
+    conn = h.open_db_connection(CREDS)
+    cur = conn.cursor()
+    cur.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+    cur.execute(f"SET search_path TO {SCHEMA}")
+    if not index_scans:
+        # Same statements, planned as if the indexes did not exist
+        for setting in ("enable_indexscan", "enable_indexonlyscan", "enable_bitmapscan"):
+            cur.execute(f"SET {setting} = off")
+    conn.commit()
+    cur.close()
+    return conn
+
+
+def seed(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT count(*) FROM demo_contacts")
+    have = cur.fetchone()[0]
+    if have < ROWS:
+        print(f"seeding {ROWS - have} rows...")
+        t0 = time.perf_counter()
+        # Names start with 8 hex digits, so a 3-character prefix matches ~1/4096 of rows
+        cur.execute("""
+            INSERT INTO demo_contacts (name, email, phone)
+            SELECT initcap(substr(md5(i::text), 1, 8)) || ' Contact ' || i,
+                   'user' || i || '@example.com',
+                   '555-' || lpad(mod(i, 10000)::text, 4, '0')
+            FROM generate_series(%s::int, %s::int) AS i
+        """, (have + 1, ROWS))
+        cur.execute("ANALYZE demo_contacts")
+        conn.commit()
+        print(f"seeded in {time.perf_counter() - t0:.1f}s")
+    cur.close()
+
+
+def explain(conn, field, value):
+    if field == "email":
+        sql, params = h.STATEMENTS["find_by_email"], {"email": value, "after_id": 0, "limit": 51}
+    else:
+        low, high = h.prefix_range(value)
+        sql = h.STATEMENTS["find_by_name_prefix"]
+        params = {"high": high, "after_name": low, "after_id": 0, "limit": 51}
+    cur = conn.cursor()
+    # Plain cursors use %s placeholders; swap the :named ones in order of appearance
+    names = sorted(params, key=lambda p: sql.index(":" + p))
+    for p in names:
+        sql = sql.replace(":" + p, "%s")
+    cur.execute("EXPLAIN " + sql, [params[p] for p in names])
+    plan = [row[0].strip() for row in cur.fetchall()]
+    conn.commit()
+    cur.close()
+    return plan
+
+
+def run(name, conn, field, values, n):
+    h.clear_prepared()
+    h.search_contacts(conn, field, values[0], h.parse_search({field: values[0]})[2])  # warm up
+    samples = []
+    for i in range(n):
+        value = values[i % len(values)]
+        t0 = time.perf_counter()
+        page = h.search_contacts(conn, field, value, h.parse_search({field: value})[2])
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    print(f"{name:<24} p50={statistics.median(samples):8.2f}ms  "
+          f"p95={samples[max(0, int(len(samples) * 0.95) - 1)]:8.2f}ms  n={n}  "
+          f"last page={len(page['items'])} rows")
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("WARNING")
+    rng = random.Random(1)
+    indexed = connect()
+    h.run_migrations(indexed)
+    seed(indexed)
+
+    emails = [f"USER{rng.randint(1, ROWS)}@example.com" for _ in range(100)]
+    prefixes = [f"{rng.randrange(4096):03x}" for _ in range(100)]
+    scan = connect(index_scans=False)
+
+    for field, values in (("email", emails), ("name_prefix", prefixes)):
+        print(f"\n{field}:")
+        for label, conn in (("index", indexed), ("no index", scan)):
+            # The scan node under Limit (and Sort, when the index order is not used)
+            scan_node = next(line for line in explain(conn, field, values[0]) if "Scan" in line)
+            print(f"  EXPLAIN ({label}): {scan_node}")
+        run(f"{field} (index)", indexed, field, values, N)
+        run(f"{field} (seq scan)", scan, field, values, SCAN_N)
+
+    scan.close()
+    if os.environ.get("BENCH_DROP") == "1":
+        cur = indexed.cursor()
+        cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        indexed.commit()
+    indexed.close()
@@ -0,0 +1,493 @@
+"""
+End-to-end load and latency suite: every route of every handler, driven
+with synthetic API Gateway v2 (payload format 2.0) events against local
+stand-ins - nothing here talks to AWS or open-meteo.
+
+- AWS services: moto (in-process), or any endpoint that speaks the AWS
+  APIs (LocalStack) via BENCH_AWS_ENDPOINT
+- api-rds: a local Postgres (BENCH_PG_HOST / BENCH_PG_USER /
+  BENCH_PG_PASSWORD, database "maindb" on 5432); skipped if unreachable
+- api-weather: the stub_open_meteo server
+
+Each route runs in a fresh worker process, which reports:
+- cold: module import and first invocation, as on a new Lambda container
+  (modules the stand-ins already loaded, e.g. boto3 under moto, are not in
+  the import time; bench_cold_start.py measures imports in isolation)
+- warm: p50/p95/p99/mean over sequential invocations
+- concurrent: throughput with N warm "containers" (forked workers)
+  invoking in parallel, and their p99
+- peak RSS of the worker after the warm phase
+
+pip install "moto[all]" boto3 pg8000
+python3 bench_suite.py                                   # everything
+python3 bench_suite.py api-todo api-queue --route GET    # some
+python3 bench_suite.py --json now.json --baseline before.json
+    # exits 1 if any route's warm p50 or p99 grew more than --tolerance
+    # (and by more than --min-delta-ms)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import uuid
+
+SCRIPTS = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+COMMON = os.path.join(SCRIPTS, "common")
+RESULT_MARKER = "BENCH_RESULT "
+
+SEED_ITEMS = int(os.environ.get("BENCH_SEED_ITEMS", "500"))
+PG_HOST = os.environ.get("BENCH_PG_HOST", "localhost")
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "local",
+    "AWS_SECRET_ACCESS_KEY": "local",
+    "LOG_LEVEL": "WARNING",
+    "LOG_EVENT_SAMPLE_RATE": "0",
+}
+
+
+# ---------- Events ----------
+def http_event(method, path, qs=None, body=None, headers=None, path_params=None, route_key=None):
+    qs = {k: str(v) for k, v in (qs or {}).items()}
+    now = time.time()
+    return {
+        "version": "2.0",
+        "routeKey": route_key or f"{method} {path}",
+        "rawPath": path,
+        "rawQueryString": urllib.parse.urlencode(qs),
+        "headers": {"content-type": "application/json", "user-agent": "bench-suite",
+                    "referer": "https://localhost/bench", **(headers or {})},
+        "queryStringParameters": qs or None,
+        "pathParameters": path_params,
+        "requestContext": {
+            "accountId": "000000000000",
+            "apiId": "local",
+            "domainName": "localhost",
+            "http": {"method": method, "path": path, "protocol": "HTTP/1.1",
+                     "sourceIp": "127.0.0.1", "userAgent": "bench-suite"},
+            "requestId": str(uuid.uuid4()),
+            "routeKey": route_key or f"{method} {path}",
+            "stage": "$default",
+            "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+            "timeEpoch": int(now * 1000),
+        },
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def sqs_event(count, queue_arn="arn:aws:sqs:us-east-1:000000000000:local"):
+    sent = str(int(time.time() * 1000))
+    return {"Records": [{
+        "messageId": str(uuid.uuid4()), "receiptHandle": "local", "body": json.dumps({"n": n}),
+        "attributes": {"ApproximateReceiveCount": "1", "SentTimestamp": sent},
+        "messageAttributes": {}, "eventSource": "aws:sqs", "eventSourceARN": queue_arn, "awsRegion": "us-east-1",
+    } for n in range(count)]}
+
+
+class LambdaContext:
+    def __init__(self, name, timeout_seconds=15):
+        self.function_name = f"t5-{name}"
+        self.memory_limit_in_mb = 128
+        self.aws_request_id = str(uuid.uuid4())
+        self.invoked_function_arn = f"arn:aws:lambda:us-east-1:000000000000:function:{self.function_name}"
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return int(max(self._deadline - time.monotonic(), 0) * 1000)
+
+
+# ---------- Stand-ins and routes per handler ----------
+# setup() runs in the worker before the handler is imported; it creates
+# local resources and sets the handler's environment. Each route is
+# (name, module, event_for_iteration).
+def aws_standin():
+    endpoint = os.environ.get("BENCH_AWS_ENDPOINT")
+    if endpoint:
+        os.environ["AWS_ENDPOINT_URL"] = endpoint
+        return
+    from moto import mock_aws
+    mock_aws().start()
+
+
+def setup_todo():
+    aws_standin()
+    os.environ["BENCH_ITEMS"] = str(SEED_ITEMS)
+    from bench_todo_scan import seed
+    seed("t5-test-todo")
+
+
+def todo_routes():
+    ids = [f"{i:010d}" for i in range(SEED_ITEMS)]
+    path = "/api-todo"
+    return [
+        ("POST create", lambda i: http_event("POST", path, body={"task": f"bench {i}", "ttl_seconds": 600})),
+        ("POST batch x25", lambda i: http_event("POST", path, body=[{"task": f"bench {i}.{j}"} for j in range(25)])),
+        ("GET by id", lambda i: http_event("GET", path, qs={"id": ids[i % len(ids)]})),
+        ("GET ids x100", lambda i: http_event("GET", path, qs={"ids": ",".join(ids[:100])})),
+        ("GET page limit=100", lambda i: http_event("GET", path, qs={"limit": 100})),
+        ("GET done=false", lambda i: http_event("GET", path, qs={"done": "false", "limit": 50})),
+        ("GET full scan", lambda i: http_event("GET", path)),
+        ("PUT update", lambda i: http_event("PUT", path, body={"id": ids[i % len(ids)], "task": "updated",
+                                                              "done": i % 2 == 0})),
+        ("DELETE by id", lambda i: http_event("DELETE", path, qs={"id": f"missing-{i}"})),
+        ("DELETE batch x25", lambda i: http_event("DELETE", path, body={"ids": [f"missing-{i}-{j}" for j in range(25)]})),
+    ]
+
+
+def setup_queue():
+    aws_standin()
+    import boto3
+    sqs = boto3.client("sqs")
+    queue_url = sqs.create_queue(QueueName="bench-suite-queue")["QueueUrl"]
+    for j in range(0, SEED_ITEMS, 10):
+        sqs.send_message_batch(QueueUrl=queue_url, Entries=[
+            {"Id": str(k), "MessageBody": f"seed {j + k}"} for k in range(min(10, SEED_ITEMS - j))])
+    os.environ["QUEUE_URL"] = queue_url
+    # Any cheap two-argument callable: measures the consumer, not the processing
+    os.environ["CONSUMER_HANDLER"] = "operator:is_not"
+
+
+def queue_routes():
+    path = "/api-queue"
+    return [
+        ("POST send", lambda i: http_event("POST", path, body={"message": f"bench {i}"})),
+        ("POST batch x10", lambda i: http_event("POST", path, body={"messages": [f"bench {i}.{j}" for j in range(10)]})),
+        ("GET max=1", lambda i: http_event("GET", path)),
+        ("GET max=10 wait=0", lambda i: http_event("GET", path, qs={"max": 10, "wait": 0})),
+        ("DELETE batch x10", lambda i: http_event("DELETE", path, body={"receiptHandles": [f"h-{i}-{j}" for j in range(10)]})),
+        ("PUT visibility x10", lambda i: http_event("PUT", path, body={"entries": [
+            {"receiptHandle": f"h-{i}-{j}", "visibilityTimeout": 5} for j in range(10)]})),
+        ("SQS consumer x10", "consumer", lambda i: sqs_event(10)),
+    ]
+
+
+def setup_notify():
+    aws_standin()
+    import boto3
+    sns = boto3.client("sns")
+    topic_arn = sns.create_topic(Name="bench-suite-topic")["TopicArn"]
+    for j in range(SEED_ITEMS):
+        sns.subscribe(TopicArn=topic_arn, Protocol="sqs", Endpoint=f"arn:aws:sqs:us-east-1:000000000000:bench-{j}")
+    os.environ["TOPIC_ARN"] = topic_arn
+
+
+def notify_routes():
+    path = "/api-notify"
+    return [
+        ("OPTIONS", lambda i: http_event("OPTIONS", path)),
+        ("POST publish", lambda i: http_event("POST", path, body={"message": f"bench {i}",
+                                                                "attributes": {"severity": "low"}})),
+        ("POST batch x10", lambda i: http_event("POST", path, body={"messages": [
+            {"message": f"bench {i}.{j}", "attributes": {"severity": "high", "seq": j}} for j in range(10)]})),
+        ("GET all", lambda i: http_event("GET", path)),
+        ("GET limit=100", lambda i: http_event("GET", path, qs={"limit": 100})),
+    ]
+
+
+def setup_log():
+    aws_standin()
+    import boto3
+    logs = boto3.client("logs")
+    logs.create_log_group(logGroupName="/aws/lambda/t5-api-log")
+
+
+def log_routes():
+    path = "/api-log"
+    return [
+        ("POST event", lambda i: http_event("POST", path, body={"event": "bench_click", "page": "/bench"})),
+        # The compact batch js/log.js sends
+        ("POST batch x20", lambda i: http_event("POST", path, body={
+            "page": "/bench", "sent": int(time.time() * 1000),
+            "events": [{"e": f"bench_{j}", "t": int(time.time() * 1000) - 20 + j} for j in range(20)]})),
+        ("GET hours=1", lambda i: http_event("GET", path, qs={"hours": 1, "limit": 25})),
+        ("GET /stats", lambda i: http_event("GET", path + "/stats", qs={"hours": 1})),
+    ]
+
+
+def setup_weather():
+    from stub_open_meteo import StubOpenMeteo
+    stub = StubOpenMeteo(latency=float(os.environ.get("BENCH_UPSTREAM_LATENCY", "0.02"))).start()
+    os.environ["GEOCODE_URL"] = stub.url + "/v1/search"
+    os.environ["FORECAST_URL"] = stub.url + "/v1/forecast"
+
+
+def weather_routes():
+    path = "/api-weather"
+    return [
+        ("OPTIONS", lambda i: http_event("OPTIONS", path)),
+        ("GET city (cached)", lambda i: http_event("GET", path, qs={"city": "London"})),
+        ("GET city (uncached)", lambda i: http_event("GET", path, qs={"city": f"Bench City {i} {uuid.uuid4().hex[:6]}"})),
+        ("GET 5 cities", lambda i: http_event("GET", path, qs={"city": "London,Tokyo,Paris,Lima,Oslo"})),
+    ]
+
+
+def setup_rds():
+    try:
+        socket.create_connection((PG_HOST, 5432), timeout=1).close()
+    except OSError:
+        raise RuntimeError(f"no Postgres on {PG_HOST}:5432")
+    aws_standin()
+    import boto3
+    secret = boto3.client("secretsmanager").create_secret(Name="bench-suite-db", SecretString=json.dumps({
+        "username": os.environ.get("BENCH_PG_USER", "postgres"),
+        "password": os.environ.get("BENCH_PG_PASSWORD", "postgres"),
+    }))
+    os.environ["SECRET_ARN"] = secret["ARN"]
+    os.environ["DB_HOST"] = PG_HOST
+
+
+def rds_routes():
+    def by_id(method, i, body=None):
+        contact_id = (i % SEED_ITEMS) + 1
+        return http_event(method, f"/api-rds/{contact_id}", body=body, path_params={"id": str(contact_id)},
+                          route_key=f"{method} /api-rds/{{id}}")
+    return [
+        ("POST create", lambda i: http_event("POST", "/api-rds", body={"name": f"Bench {i}",
+                                                                     "email": f"bench{i}@example.com"})),
+        ("POST _bulk x100", lambda i: http_event("POST", "/api-rds/_bulk", body=[
+            {"name": f"Bulk {i}.{j}", "email": f"bulk{i}.{j}@example.com"} for j in range(100)])),
+        ("GET by id", lambda i: by_id("GET", i)),
+        ("GET list limit=50", lambda i: http_event("GET", "/api-rds", qs={"limit": 50})),
+        ("GET ?email=", lambda i: http_event("GET", "/api-rds", qs={"email": f"seed{i % SEED_ITEMS}@example.com"})),
+        ("GET ?name_prefix=", lambda i: http_event("GET", "/api-rds", qs={"name_prefix": f"Seed {i % 10}", "limit": 50})),
+        ("PUT by id", lambda i: by_id("PUT", i, {"name": f"Updated {i}", "email": f"u{i}@example.com"})),
+        ("DELETE by id", lambda i: http_event("DELETE", f"/api-rds/{10 ** 9 + i}", path_params={"id": str(10 ** 9 + i)},
+                                              route_key="DELETE /api-rds/{id}")),
+    ]
+
+
+def seed_rds(modules):
+    h = modules["lambda_handler"]
+    for j in range(0, SEED_ITEMS, h.MAX_BULK_ITEMS):
+        h.lambda_handler(http_event("POST", "/api-rds/_bulk", body=[
+            {"name": f"Seed {k}", "email": f"seed{k}@example.com"} for k in range(j, min(j + h.MAX_BULK_ITEMS, SEED_ITEMS))
+        ]), LambdaContext("api-rds"))
+
+
+def after_fork_rds(modules):
+    # The parent's socket must not be shared; each forked "container" connects on its own
+    modules["lambda_handler"]._conn = None
+    modules["lambda_handler"]._reader_conn = None
+
+
+def after_fork_weather(modules):
+    modules["lambda_handler"]._pool.clear()
+
+
+def after_fork_queue(modules):
+    # A forked executor keeps the parent's bookkeeping but none of its threads,
+    # so submitted work would never run
+    if "consumer" in modules:
+        from concurrent.futures import ThreadPoolExecutor
+        modules["consumer"]._pool = ThreadPoolExecutor(max_workers=modules["consumer"].MAX_WORKERS)
+
+
+HANDLERS = {
+    "api-log": {"setup": setup_log, "routes": log_routes},
+    "api-notify": {"setup": setup_notify, "routes": notify_routes},
+    "api-queue": {"setup": setup_queue, "routes": queue_routes, "after_fork": after_fork_queue},
+    "api-rds": {"setup": setup_rds, "routes": rds_routes, "seed": seed_rds, "after_fork": after_fork_rds},
+    "api-todo": {"setup": setup_todo, "routes": todo_routes},
+    "api-weather": {"setup": setup_weather, "routes": weather_routes, "after_fork": after_fork_weather},
+}
+
+
+def route_table(handler):
+    # (name, module, event_fn); module defaults to lambda_handler
+    return [r if len(r) == 3 else (r[0], "lambda_handler", r[1]) for r in HANDLERS[handler]["routes"]()]
+
+
+# ---------- Worker (one process per route) ----------
+def percentile(sorted_ms, p):
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * p))]
+
+
+def summarize(ms):
+    ms = sorted(ms)
+    return {"p50_ms": round(statistics.median(ms), 3), "p95_ms": round(percentile(ms, 0.95), 3),
+            "p99_ms": round(percentile(ms, 0.99), 3), "mean_ms": round(statistics.fmean(ms), 3)}
+
+
+def invoke(fn, name, event):
+    t0 = time.perf_counter()
+    try:
+        res = fn(event, LambdaContext(name))
+        status = res.get("statusCode", 200) if isinstance(res, dict) else 200
+    except Exception as e:
+        status = type(e).__name__
+    return (time.perf_counter() - t0) * 1000, status
+
+
+def concurrent_child(conn, fn, name, event_fn, offset, count, start_at, hook, modules):
+    if hook:
+        hook(modules)
+    while time.time() < start_at:
+        time.sleep(0.001)
+    runs = [invoke(fn, name, event_fn(offset + i)) for i in range(count)]
+    conn.send(runs)
+    conn.close()
+
+
+def run_worker(handler, route_name, warm, concurrency, per_worker):
+    spec = HANDLERS[handler]
+    handler_dir = os.path.join(SCRIPTS, handler)
+    sys.path[:0] = [handler_dir, COMMON, os.path.dirname(os.path.abspath(__file__))]
+    spec["setup"]()
+
+    name, module_name, event_fn = next(r for r in route_table(handler) if r[0] == route_name)
+    t0 = time.perf_counter()
+    modules = {"lambda_handler": __import__("lambda_handler")}
+    if module_name != "lambda_handler":
+        modules[module_name] = __import__(module_name)
+    import_ms = (time.perf_counter() - t0) * 1000
+    if "seed" in spec:
+        spec["seed"](modules)
+    fn = modules[module_name].lambda_handler
+
+    first_ms, first_status = invoke(fn, handler, event_fn(0))
+    statuses = {str(first_status): 1}
+    warm_ms = []
+    for i in range(1, warm + 1):
+        ms, status = invoke(fn, handler, event_fn(i))
+        warm_ms.append(ms)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Forked children start from this warm process, like warm containers
+    ctx = multiprocessing.get_context("fork")
+    start_at = time.time() + 0.5
+    children = []
+    for c in range(concurrency):
+        parent_end, child_end = ctx.Pipe(duplex=False)
+        p = ctx.Process(target=concurrent_child, args=(
+            child_end, fn, handler, event_fn, (c + 1) * 100000, per_worker, start_at, spec.get("after_fork"), modules))
+        p.start()
+        children.append((p, parent_end))
+    conc_runs = []
+    for p, parent_end in children:
+        conc_runs.extend(parent_end.recv())
+        p.join()
+    wall = time.time() - start_at
+    for _, status in conc_runs:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        "handler": handler,
+        "route": name,
+        "cold": {"import_ms": round(import_ms, 3), "first_invoke_ms": round(first_ms, 3),
+                 "total_ms": round(import_ms + first_ms, 3)},
+        "warm": {"n": warm, **summarize(warm_ms)},
+        "concurrent": {"workers": concurrency, "n": len(conc_runs),
+                       "throughput_rps": round(len(conc_runs) / wall, 1),
+                       "p99_ms": summarize([ms for ms, _ in conc_runs])["p99_ms"]},
+        "peak_rss_mb": round(rss_kb / 1024, 1),
+        "statuses": statuses,
+    }
+
+
+# ---------- Orchestrator ----------
+def run_route(handler, route, args):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", handler, route,
+           "--warm", str(args.warm), "--concurrency", str(args.concurrency), "--per-worker", str(args.per_worker)]
+    try:
+        proc = subprocess.run(cmd, env={**os.environ, **ENV}, capture_output=True, text=True,
+                              cwd=os.path.join(SCRIPTS, handler), timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        return {"handler": handler, "route": route, "skipped": f"timed out after {args.timeout}s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    reason = (proc.stderr.strip().splitlines() or ["worker produced no result"])[-1]
+    return {"handler": handler, "route": route, "skipped": reason}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=SCRIPTS, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(r):
+    label = f"{r['handler']:<12} {r['route']:<22}"
+    if "skipped" in r:
+        print(f"{label} skipped: {r['skipped']}")
+        return
+    w, c = r["warm"], r["concurrent"]
+    print(f"{label} cold={r['cold']['total_ms']:8.1f}ms  warm p50={w['p50_ms']:7.2f} p95={w['p95_ms']:7.2f} "
+          f"p99={w['p99_ms']:7.2f}ms  x{c['workers']}={c['throughput_rps']:7.1f}/s  "
+          f"rss={r['peak_rss_mb']:6.1f}MB  {r['statuses']}")
+
+
+def compare(results, baseline_path, tolerance, min_delta_ms):
+    with open(baseline_path) as f:
+        before = {(r["handler"], r["route"]): r for r in json.load(f)["results"] if "warm" in r}
+    regressions = []
+    for r in results:
+        old = before.get((r["handler"], r["route"]))
+        if not old or "warm" not in r:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            grown = r["warm"][metric] - old["warm"][metric]
+            # Sub-millisecond routes are mostly noise in relative terms
+            if r["warm"][metric] > old["warm"][metric] * (1 + tolerance) and grown > min_delta_ms:
+                regressions.append(f"{r['handler']} {r['route']} warm {metric}: "
+                                   f"{old['warm'][metric]} -> {r['warm'][metric]}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("handlers", nargs="*")
+    parser.add_argument("--route", help="only routes whose name contains this")
+    parser.add_argument("--warm", type=int, default=200, help="sequential warm invocations")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel warm workers")
+    parser.add_argument("--per-worker", type=int, default=50, help="invocations per parallel worker")
+    parser.add_argument("--timeout", type=int, default=600, help="seconds per route")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed warm p50/p99 growth (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore growth smaller than this many ms")
+    parser.add_argument("--worker", nargs=2, metavar=("HANDLER", "ROUTE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(*args.worker, args.warm, args.concurrency, args.per_worker)
+        print(RESULT_MARKER + json.dumps(result), flush=True)
+        # Skip interpreter teardown of stand-in threads (stub server, moto)
+        os._exit(0)
+
+    results = []
+    for handler in args.handlers or sorted(HANDLERS):
+        for route, _, _ in route_table(handler):
+            if args.route and args.route not in route:
+                continue
+            result = run_route(handler, route, args)
+            print_result(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"commit": git_commit(), "timestamp": int(time.time()), "python": platform.python_version(),
+                       "machine": platform.machine(), "results": results}, f, indent=2)
+
+    if args.baseline and compare(results, args.baseline, args.tolerance, args.min_delta_ms):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cost of the per-invocation timing layer (common/timing.py): a trivial
+handler bare, under log_request with timing, with spans recorded, and with
+the Server-Timing header, plus the cost of one span on its own. The EMF
+line is written to /dev/null so its formatting and I/O are included.
+Pure stdlib; no AWS needed.
+
+python3 bench_timing_overhead.py
+"""
+import contextlib
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+import request_logging as rl  # noqa: E402
+import timing  # noqa: E402
+
+N = int(os.environ.get("BENCH_N", "20000"))
+SPANS = ["dynamodb.GetItem", "dynamodb.Query", "secretsmanager.GetSecretValue", "pg.SELECT", "http.api.open-meteo.com"]
+RESPONSE = {"statusCode": 200, "headers": {"Content-Type": "application/json"}, "body": "{}"}
+
+
+def handler(event, context):
+    return dict(RESPONSE)
+
+
+def with_spans(event, context):
+    for name in SPANS:
+        with timing.span(name):
+            pass
+    return dict(RESPONSE)
+
+
+def run(name, fn, n=N):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn({}, None)
+    us = (time.perf_counter() - t0) / n * 1e6
+    print(f"{name:<32} {us:8.2f}us per invocation")
+    return us
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    base = run("bare handler", handler)
+    run("log_request + timing", rl.log_request(handler))
+    run(f"  + {len(SPANS)} spans", rl.log_request(with_spans))
+    timing.SERVER_TIMING_ENABLED = True
+    run(f"  + {len(SPANS)} spans + Server-Timing", rl.log_request(with_spans))
+    timing.SERVER_TIMING_ENABLED = timing.METRICS_ENABLED = False
+    run("log_request, timing output off", rl.log_request(handler))
+
+    timing.start_invocation()
+    t0 = time.perf_counter()
+    for _ in range(N):
+        with timing.span("x"):
+            pass
+    print(f"{'one span':<32} {(time.perf_counter() - t0) / N * 1e6:8.2f}us")
@@ -0,0 +1,44 @@
+"""
+api-todo write/read throughput: one put_item/get_item per task vs the
+batch routes (BatchWriteItem x25, BatchGetItem x100).
+
+Same local DynamoDB options as bench_todo_scan.py (moto by default,
+DYNAMODB_ENDPOINT for DynamoDB Local).
+
+python3 bench_todo_batch.py
+"""
+import os
+import sys
+import time
+
+# Empty table; seed() only creates it
+os.environ["BENCH_ITEMS"] = "0"
+from bench_todo_scan import local_aws, seed  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-todo"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+N = int(os.environ.get("BENCH_N", "2000"))
+
+
+def timed(name, fn):
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<14} {N / elapsed:9.0f} items/sec  ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    with local_aws():
+        import lambda_handler as h
+        h.logger.setLevel("WARNING")
+        seed(h.TABLE_NAME)
+
+        single = [h.build_item({"id": f"s-{i}", "task": f"single {i}"}) for i in range(N)]
+        timed("single put", lambda: [h.get_table().put_item(Item=item) for item in single])
+        timed("batch put", lambda: [h.batch_put([{"id": f"b-{i}", "task": f"batch {i}"}
+                                                 for i in range(j, min(j + h.MAX_BATCH_ITEMS, N))])
+                                    for j in range(0, N, h.MAX_BATCH_ITEMS)])
+        timed("single get", lambda: [h.get_table().get_item(Key={"id": f"s-{i}"}) for i in range(N)])
+        timed("batch get", lambda: [h.batch_get([f"b-{i}" for i in range(j, min(j + h.MAX_BATCH_ITEMS, N))])
+                                    for j in range(0, N, h.MAX_BATCH_ITEMS)])
@@ -0,0 +1,107 @@
+"""
+api-todo listing: paginated scan walk vs parallel segmented scan at
+different segment counts, against a local DynamoDB stand-in. First checks
+that the full listing (GET /api-todo) returns 200 with every item.
+
+Runs in-process on moto by default:
+
+pip install "moto[dynamodb]" boto3
+python3 bench_todo_scan.py
+
+or against DynamoDB Local by setting DYNAMODB_ENDPOINT, e.g.
+
+docker run --rm -p 8000:8000 amazon/dynamodb-local
+DYNAMODB_ENDPOINT=http://localhost:8000 python3 bench_todo_scan.py
+
+moto serves every segment from the same interpreter as the handler, so
+it shows the cost of following pages but not the parallel speedup; that
+needs DynamoDB Local or a real table.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-todo"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+ITEMS = int(os.environ.get("BENCH_ITEMS", "20000"))
+ENDPOINT = os.environ.get("DYNAMODB_ENDPOINT")
+
+
+def local_aws():
+    if ENDPOINT:
+        # Route every boto3 client in this process to DynamoDB Local
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = ENDPOINT
+        return contextlib.nullcontext()
+    from moto import mock_aws
+    return mock_aws()
+
+
+def seed(table_name):
+    ddb = boto3.resource("dynamodb")
+    table = ddb.create_table(
+        TableName=table_name,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in ("id", "status", "created_at")],
+        GlobalSecondaryIndexes=[{
+            "IndexName": "status-created_at-index",
+            "KeySchema": [{"AttributeName": "status", "KeyType": "HASH"},
+                          {"AttributeName": "created_at", "KeyType": "RANGE"}],
+            "Projection": {"ProjectionType": "ALL"},
+        }],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table.wait_until_exists()
+    with table.batch_writer() as batch:
+        for i in range(ITEMS):
+            batch.put_item(Item={"id": f"{i:010d}", "task": f"task {i} " + "x" * 200,
+                                 "created_at": f"2025-10-26T21:30:45.{i:06d}Z", "ttl": 1735309845,
+                                 "done": False, "status": "open"})
+
+
+def timed(name, fn):
+    t0 = time.perf_counter()
+    count = fn()
+    print(f"{name:<24} {time.perf_counter() - t0:7.3f}s  items={count}")
+    # A timing is only worth reporting if the whole table came back
+    assert count == ITEMS, f"{name} listed {count} of {ITEMS} items"
+
+
+def check_listing(h):
+    """GET /api-todo end to end: segmented scan, AttributeValue conversion, to_json."""
+    res = h.lambda_handler({"requestContext": {"http": {"method": "GET"}}}, None)
+    assert res["statusCode"] == 200, res
+    items = json.loads(res["body"])
+    assert sorted(i["id"] for i in items) == [f"{i:010d}" for i in range(ITEMS)]
+    assert all(i["ttl"] == 1735309845 and i["done"] is False and i["status"] == "open" for i in items)
+    print(f"{'GET /api-todo':<24} status=200  items={len(items)}")
+
+
+def walk_pages(h):
+    count, token = 0, None
+    while True:
+        page = h.scan_page(h.MAX_PAGE_LIMIT, token)
+        count += len(page["items"])
+        token = page["next_token"]
+        if not token:
+            return count
+
+
+if __name__ == "__main__":
+    with local_aws():
+        import lambda_handler as h
+        h.logger.setLevel("WARNING")
+        seed(h.TABLE_NAME)
+        print(f"{ITEMS} items in {h.TABLE_NAME}")
+        check_listing(h)
+        timed("paginated (limit=100)", lambda: walk_pages(h))
+        for segments in (1, 2, 4, 8, 16):
+            timed(f"segmented x{segments}", lambda: len(h.scan_all(segments)))
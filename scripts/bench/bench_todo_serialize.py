@@ -0,0 +1,70 @@
+"""
+api-todo response serialization on a 10k-item scan result: the old path
+(TypeDeserializer -> decimal_to_float copy -> json.dumps) vs the current
+one (from_attribute_value -> to_json with DecimalEncoder). Reports time
+and peak traced memory. No AWS access needed, only boto3 importable.
+
+python3 bench_todo_serialize.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-todo"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("TIMING_METRICS", "0")
+
+import lambda_handler as h  # noqa: E402
+
+N = int(os.environ.get("BENCH_ITEMS", "10000"))
+RAW = [{
+    "id": {"S": f"{i:020d}"},
+    "task": {"S": f"task number {i} with some description text"},
+    "created_at": {"S": "2025-10-26T21:30:45.123456Z"},
+    "ttl": {"N": str(1735309845 + i)},
+    "done": {"BOOL": i % 2 == 0},
+} for i in range(N)]
+
+
+def decimal_to_float(obj):
+    if isinstance(obj, list):
+        return [decimal_to_float(i) for i in obj]
+    if isinstance(obj, dict):
+        return {k: decimal_to_float(v) for k, v in obj.items()}
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return obj
+
+
+def before():
+    d = TypeDeserializer()
+    items = [{k: d.deserialize(v) for k, v in i.items()} for i in RAW]
+    return json.dumps(decimal_to_float(items))
+
+
+def after():
+    items = [{k: h.from_attribute_value(v) for k, v in i.items()} for i in RAW]
+    return h.to_json(items)
+
+
+def run(name, fn):
+    fn()
+    t0 = time.perf_counter()
+    body = fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<8} {elapsed * 1000:8.1f}ms  peak={peak / 1e6:6.1f}MB  body={len(body) / 1e6:5.2f}MB")
+
+
+if __name__ == "__main__":
+    run("before", before)
+    run("after", after)
@@ -0,0 +1,52 @@
+"""
+api-weather against a local open-meteo stub with injected latency:
+a single lookup vs a multi-city batch, with caching disabled so every
+lookup goes upstream. Also reports TCP connections opened, to show the
+keep-alive pool at work. Pure stdlib.
+
+python3 bench_weather_batch.py
+"""
+import os
+import sys
+import time
+
+from stub_open_meteo import StubOpenMeteo
+
+LATENCY = float(os.environ.get("BENCH_LATENCY", "0.1"))
+CITIES = ["London", "Tokyo", "New York", "Paris", "Lima", "Cairo", "Sydney", "Oslo"]
+
+stub = StubOpenMeteo(latency=LATENCY).start()
+os.environ["GEOCODE_URL"] = stub.url + "/v1/search"
+os.environ["FORECAST_URL"] = stub.url + "/v1/forecast"
+# Every lookup must reach the stub
+os.environ["GEOCODE_TTL_SECONDS"] = "0"
+os.environ["FORECAST_TTL_SECONDS"] = "0"
+os.environ.setdefault("TIMING_METRICS", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-weather"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+import lambda_handler as h  # noqa: E402
+
+
+def invoke(city):
+    event = {"requestContext": {"http": {"method": "GET"}}, "queryStringParameters": {"city": city}}
+    t0 = time.perf_counter()
+    res = h.lambda_handler(event, None)
+    assert res["statusCode"] == 200, res
+    return (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("WARNING")
+    print(f"stub latency {LATENCY * 1000:.0f}ms per upstream call")
+    invoke("Warmup")
+    conns = stub.connections
+    single = invoke("London")
+    print(f"single city        {single:8.1f}ms  new connections={stub.connections - conns}")
+    for n in (2, 4, 8):
+        conns = stub.connections
+        batch = invoke(",".join(CITIES[:n]))
+        print(f"batch of {n} cities  {batch:8.1f}ms  ({batch / single:4.2f}x single)  "
+              f"new connections={stub.connections - conns}")
+    stub.stop()
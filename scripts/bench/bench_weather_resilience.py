@@ -0,0 +1,88 @@
+"""
+api-weather tail latency against a misbehaving upstream: the local
+open-meteo stub is switched between healthy, slow, failing and recovered,
+and the handler's latency and responses are recorded for each phase.
+
+Forecasts are cached with a zero TTL (but a stale window), so every
+request after the first goes upstream and the stale-while-revalidate,
+latency-budget and circuit-breaker paths are all exercised. Pure stdlib.
+
+python3 bench_weather_resilience.py
+"""
+import os
+import statistics
+import sys
+import time
+
+from stub_open_meteo import StubOpenMeteo
+
+N = int(os.environ.get("BENCH_REQUESTS", "20"))
+SLOW_SECONDS = 3.0
+
+stub = StubOpenMeteo(latency=0.02).start()
+os.environ["GEOCODE_URL"] = stub.url + "/v1/search"
+os.environ["FORECAST_URL"] = stub.url + "/v1/forecast"
+os.environ["FORECAST_TTL_SECONDS"] = "0"
+os.environ["REQUEST_BUDGET_SECONDS"] = "1"
+os.environ["BREAKER_RESET_SECONDS"] = "2"
+os.environ.setdefault("TIMING_METRICS", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api-weather"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "common"))
+
+import json  # noqa: E402
+
+import lambda_handler as h  # noqa: E402
+
+
+def invoke(city="London"):
+    event = {"requestContext": {"http": {"method": "GET"}}, "queryStringParameters": {"city": city}}
+    t0 = time.perf_counter()
+    res = h.lambda_handler(event, None)
+    return (time.perf_counter() - t0) * 1000, res["statusCode"], json.loads(res["body"])
+
+
+def phase(name, n=N, city="London"):
+    requests_before = stub.requests
+    runs = [invoke(city) for _ in range(n)]
+    ms = sorted(r[0] for r in runs)
+    statuses = {}
+    for _, status, body in runs:
+        label = f"{status}{' stale' if body.get('stale') else ''}"
+        statuses[label] = statuses.get(label, 0) + 1
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(f"{name:<28} p50={statistics.median(ms):7.1f}ms  p99={p99:7.1f}ms  "
+          f"upstream calls={stub.requests - requests_before:3d}  {statuses}")
+    return runs
+
+
+if __name__ == "__main__":
+    h.logger.setLevel("ERROR")
+
+    runs = phase("healthy")
+    assert all(status == 200 and not body.get("stale") for _, status, body in runs)
+
+    stub.latency = SLOW_SECONDS
+    runs = phase("slow upstream (3s)", n=5)
+    # Capped by the 1s budget and answered from the stale entry; nothing is
+    # left running once a request returns
+    assert all(status == 200 and body.get("stale") for _, status, body in runs)
+    assert max(r[0] for r in runs) < 1500
+
+    stub.latency, stub.error_rate = 0.02, 1.0
+    runs = phase("failing upstream")
+    assert all(status == 200 and body.get("stale") for _, status, body in runs)
+    forecast_breaker = h.breaker_for(stub.url.split("//")[1])
+    assert forecast_breaker.state == "open"
+
+    runs = phase("circuit open, uncached city", n=5, city="Reykjavik")
+    assert all(status == 503 for _, status, _ in runs)
+
+    stub.error_rate = 0.0
+    time.sleep(2.1)
+    runs = phase("recovered")
+    assert runs[-1][1] == 200 and not runs[-1][2].get("stale")
+    assert forecast_breaker.state == "closed"
+
+    stub.stop()
+    print("ok")
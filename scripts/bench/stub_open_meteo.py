@@ -0,0 +1,92 @@
+"""
+Local stand-in for the open-meteo geocoding and forecast APIs, for the
+api-weather benchmarks.
+
+Speaks HTTP/1.1 keep-alive, injects a fixed latency (and optionally
+errors or extra delay) per request, and counts TCP connections and
+requests so connection reuse is visible.
+
+    server = StubOpenMeteo(latency=0.05).start()
+    os.environ["GEOCODE_URL"] = server.url + "/v1/search"
+    os.environ["FORECAST_URL"] = server.url + "/v1/forecast"
+"""
+import json
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOpenMeteo:
+    def __init__(self, latency=0.05, error_rate=0.0, slow_rate=0.0, slow_latency=5.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # One write per response, so Nagle + delayed ACK don't add ~40ms
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                roll = random.random()
+                time.sleep(stub.slow_latency if roll < stub.slow_rate else stub.latency)
+                if random.random() < stub.error_rate:
+                    return self._send(503, {"error": "injected"})
+
+                url = urllib.parse.urlsplit(self.path)
+                qs = dict(urllib.parse.parse_qsl(url.query))
+                if url.path.endswith("/search"):
+                    name = qs.get("name", "")
+                    if name.lower().startswith("nowhere"):
+                        return self._send(200, {})
+                    seed = sum(map(ord, name))
+                    return self._send(200, {"results": [{
+                        "name": name.title(), "latitude": (seed % 180) - 90.0, "longitude": (seed % 360) - 180.0,
+                    }]})
+                return self._send(200, {"current_weather": {
+                    "temperature": 21.5, "windspeed": 3.2, "weathercode": 1, "time": "2025-10-26T21:30",
+                }})
+
+            def _send(self, status, body):
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        return Handler
@@ -0,0 +1,38 @@
+"""
+Lazily created, container-cached boto3 clients and resources.
+
+boto3 itself is only imported on first use, so routes that never touch
+AWS (e.g. OPTIONS preflights) don't pay for it on a cold start. Every
+client is instrumented for timing.py's per-invocation spans.
+"""
+import threading
+
+import timing
+
+_lock = threading.Lock()
+_clients = {}
+_resources = {}
+
+
+def get_client(service):
+    client = _clients.get(service)
+    if client is None:
+        # Client creation on the shared default session is not thread-safe
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                import boto3
+                client = _clients[service] = timing.instrument_client(boto3.client(service))
+    return client
+
+
+def get_resource(service):
+    resource = _resources.get(service)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(service)
+            if resource is None:
+                import boto3
+                resource = _resources[service] = boto3.resource(service)
+                timing.instrument_client(resource.meta.client)
+    return resource
@@ -0,0 +1,94 @@
+"""
+Shared request logging for the api-* Lambda handlers.
+
+Copied into every Lambda package by the Makefiles (see COMMON_DIR).
+
+- Level comes from LOG_LEVEL (default INFO).
+- Full API Gateway event dumps are sampled at LOG_EVENT_SAMPLE_RATE
+  (default 1%) and always written when a request fails.
+- Dumps and structured fields are only serialized if the line is actually
+  emitted, and sensitive keys are redacted.
+- log_request also brackets the invocation for timing.py's spans.
+"""
+import functools
+import json
+import logging
+import os
+import random
+
+import timing
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+EVENT_SAMPLE_RATE = float(os.environ.get("LOG_EVENT_SAMPLE_RATE", "0.01"))
+
+REDACT_KEYS = {
+    "authorization", "cookie", "set-cookie", "x-api-key", "x-amz-security-token",
+    "password", "secret", "token", "receipthandle", "subscription_arn", "endpoint",
+}
+REDACTED = "***"
+
+
+def get_logger():
+    logger = logging.getLogger()
+    logger.setLevel(LOG_LEVEL)
+    return logger
+
+
+def redact(obj):
+    if isinstance(obj, dict):
+        return {k: REDACTED if str(k).lower() in REDACT_KEYS else redact(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [redact(v) for v in obj]
+    return obj
+
+
+class Lazy:
+    """Defers building a log argument until the record is formatted."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __str__(self):
+        return str(self.fn())
+
+
+def lazy_json(obj):
+    return Lazy(lambda: json.dumps(redact(obj), default=str))
+
+
+def log_fields(logger, level, message, **fields):
+    # One JSON object per line, e.g. {"msg": "Item updated", "id": "..."}
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s", lazy_json({"msg": message, **fields}))
+
+
+def log_request(handler):
+    """
+    Wraps a lambda_handler: samples the event dump on the way in, and dumps
+    it unconditionally when the handler raises or answers with a 5xx.
+    Also collects the invocation's timing spans (see timing.py).
+    """
+    logger = logging.getLogger()
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        sampled = random.random() < EVENT_SAMPLE_RATE
+        if sampled:
+            logger.info("Event received (sampled): %s", lazy_json(event))
+        timing.start_invocation()
+        try:
+            result = handler(event, context)
+        except Exception:
+            timing.finish(context, None)
+            if not sampled:
+                logger.error("Event for failed request: %s", lazy_json(event))
+            raise
+        result = timing.finish(context, result)
+        status = result.get("statusCode", 200) if isinstance(result, dict) else 200
+        if status >= 500 and not sampled:
+            logger.error("Event for failed request: %s", lazy_json(event))
+        return result
+
+    return wrapper
@@ -0,0 +1,90 @@
+"""
+Small in-container caching helpers shared by the api-* handlers.
+
+TTLCache is a size-bounded LRU whose entries expire after a TTL. With
+stale_seconds set, expired entries are kept that much longer and can still
+be read through get_stale() (stale-while-revalidate / stale-if-error).
+single_flight() makes concurrent misses for the same key share one load.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, ttl_seconds, max_entries=256, stale_seconds=0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "stale": 0}
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < now:
+                if entry is not _MISSING and entry[0] + self.stale_seconds < now:
+                    del self._data[key]
+                self.stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def get_stale(self, key, default=None):
+        """Value for key even if expired, as long as it is within the stale window."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] + self.stale_seconds < time.monotonic():
+                return default
+            self.stats["stale"] += 1
+            return entry[1]
+
+    def put(self, key, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def single_flight(key, loader):
+    """Run loader() once per key at a time; concurrent callers get its result."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+    try:
+        result = loader()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
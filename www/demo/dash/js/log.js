@@ -1,24 +1,55 @@
 // js/log.js
-async function logEvent(eventName, pagePath) {
+// Events are buffered and sent in batches: on a size threshold, after a
+// short delay, and when the page is hidden or unloaded (via sendBeacon,
+// which survives navigation). A batch carries the page once; each event is
+// just its name ("e"), its time ("t") and, if different, its page ("p").
+// "sent" lets the server correct the times for this machine's clock.
+const LOG_ENDPOINT = "https://api.aws-serverless.net/api-log";
+const LOG_FLUSH_SIZE = 20;
+const LOG_FLUSH_DELAY_MS = 5000;
+
+let logQueue = [];
+let logTimer = null;
+
+function flushLogEvents() {
+  if (logTimer) {
+    clearTimeout(logTimer);
+    logTimer = null;
+  }
+  if (logQueue.length === 0) return;
+
+  const batch = JSON.stringify({ page: window.location.pathname, sent: Date.now(), events: logQueue });
+  logQueue = [];
+
   try {
-    const payload = {
-      event: eventName,
-      page: pagePath || window.location.pathname
-    };
+    // text/plain keeps this a CORS "simple" request (no preflight)
+    const blob = new Blob([batch], { type: "text/plain" });
+    if (navigator.sendBeacon && navigator.sendBeacon(LOG_ENDPOINT, blob)) return;
 
-    await fetch("https://api.aws-serverless.net/api-log", {
+    fetch(LOG_ENDPOINT, {
       method: "POST",
-      headers: {
-        "Content-Type": "application/json"
-      },
-      body: JSON.stringify(payload)
-    });
+      headers: { "Content-Type": "text/plain" },
+      body: batch,
+      keepalive: true
+    }).catch((err) => console.error("logEvent error:", err));
   } catch (err) {
     // fail silently; don't block the page
     console.error("logEvent error:", err);
   }
 }
 
+function logEvent(eventName, pagePath) {
+  const entry = { e: eventName, t: Date.now() };
+  if (pagePath && pagePath !== window.location.pathname) entry.p = pagePath;
+  logQueue.push(entry);
+
+  if (logQueue.length >= LOG_FLUSH_SIZE) {
+    flushLogEvents();
+  } else if (!logTimer) {
+    logTimer = setTimeout(flushLogEvents, LOG_FLUSH_DELAY_MS);
+  }
+}
+
 // Automatically log page load
 document.addEventListener("DOMContentLoaded", () => {
   logEvent(`page_load_${window.location.pathname.replace(/\//g, "_")}`, window.location.pathname);
@@ -27,13 +58,18 @@ document.addEventListener("DOMContentLoaded", () => {
 document.addEventListener("click", (e) => {
   if( e.target.localName=='label')
   {
-    const label = e.target;  
+    const label = e.target;
     const tag = label.innerText.replace(/\s+/g, "_");
 
-    console.log("stop");
     logEvent(tag, window.location.pathname);
   }
   else{
     return;
   }
   });
+
+// Last chance to send whatever is still buffered
+document.addEventListener("visibilitychange", () => {
+  if (document.visibilityState === "hidden") flushLogEvents();
+});
+window.addEventListener("pagehide", flushLogEvents);